@@ -1,42 +1,19 @@
 from docx import Document
 from docx.shared import Pt, Inches
-from db_manager import (
-    get_employment,
-    get_publications,
-    get_education,
-    get_person_info,
-    get_skills,
-    get_professional_development,
-    # get_certifications,
-    get_projects,
-)
+from profile_cache import get_cached_snapshot
 from job_relavancy_scorer import score_and_rank_relevance
 from job_posting_scraper_ai import get_scraped_job_data
 
 
 def fetch_resume_data(db_path, person_id, search_filters=None):
-    """Fetches all resume-related data from the database."""
-    if search_filters is None:
-        search_filters = {}
-    (full_name, email, linkedin, github) = get_person_info(db_path, person_id)
+    """Fetches all resume-related data from the database.
 
-    return {
-        "full_name": full_name,
-        "email": email,
-        "linkedin": linkedin,
-        "github": github,
-        "education": get_education(db_path, person_id),
-        "employment": get_employment(
-            db_path, person_id
-        ),  # , search_filters["employment_filters"]),
-        "publications": get_publications(db_path, person_id),
-        "projects": get_projects(
-            db_path, person_id, fields=["Data Science"], exclude_fields=["Personal"]
-        ),
-        "personal_projects": get_projects(db_path, person_id, types=["Personal"]),
-        "professional_development": get_professional_development(db_path, person_id),
-        "skills": get_skills(db_path, person_id),
-    }
+    search_filters may hold "employment_filters", "project_filters" and
+    "personal_project_filters" (see db_manager.get_resume_snapshot). Bullet
+    columns come back as lists. Repeat renders for the same person are served
+    from the profile cache.
+    """
+    return get_cached_snapshot(db_path, person_id, search_filters, as_lists=True)
 
 
 def build_resume(
@@ -120,26 +97,27 @@ def build_resume(
                         Inches(usable_width - margin), 2
                     )  # Right-aligned word
 
-                    for degree, institution, graduation_year, gpa in data["education"]:
-                        run = para.add_run(f"\n\t{institution}, \t{graduation_year}\n")
+                    for education in data["education"]:
+                        run = para.add_run(
+                            f"\n\t{education.institution}, \t{education.graduation_year}\n"
+                        )
                         run.font.size = Pt(10)
                         run.bold = True
-                        degree_run = para.add_run(f"\t\t{degree}\t GPA: {gpa}/4.0")
+                        degree_run = para.add_run(
+                            f"\t\t{education.degree}\t GPA: {education.graduation_gpa}/4.0"
+                        )
                         degree_run.font.size = Pt(10)
             if item == "employment":
                 if data[item]:
                     prev_company = ""
                     for position in data["employment"]:
-                        (
-                            company,
-                            location,
-                            title,
-                            start_date,
-                            end_date,
-                            field,
-                            responsibilities,
-                            # fields,
-                        ) = position
+                        company = position.company
+                        location = position.location
+                        title = position.job_title
+                        start_date = position.start_date
+                        end_date = position.end_date
+                        field = position.field
+                        responsibilities = position.responsibilities
 
                         if responsibilities:
                             responsibilities = score_and_rank_relevance(
@@ -197,7 +175,7 @@ def build_resume(
 
                             # Process responsibilities as bullet points
                             if responsibilities:
-                                for responsibility in responsibilities.split(";"):
+                                for responsibility in responsibilities:
 
                                     if responsibility.strip():
                                         # Create a properly formatted bullet point with the dash and spaces
@@ -232,15 +210,13 @@ def build_resume(
                 run.bold = True
 
                 for project in data[focus]:
-                    (
-                        project_name,
-                        year,
-                        technologies,
-                        project_link,
-                        field,
-                        project_type,
-                        details,
-                    ) = project
+                    project_name = project.project_name
+                    year = project.year
+                    technologies = project.technologies
+                    project_link = project.project_link
+                    field = project.field
+                    project_type = project.project_type
+                    details = project.details
 
                     # Reset paragraph indentation for each new company
                     proj_para = doc.add_paragraph()
@@ -269,7 +245,7 @@ def build_resume(
                     tools_run.font.size = Pt(10)
 
                     if details:
-                        for detail in details.split(";"):
+                        for detail in details:
                             if detail.strip():
                                 # Create a properly formatted bullet point with the dash and spaces
                                 bullet_para = doc.add_paragraph(style="List Bullet")
@@ -0,0 +1,93 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import db_manager
+from db_connection import close_connections
+from profile_cache import get_cached_snapshot as _get_cached_snapshot
+
+# Awaitable versions of every public db_manager function (plus the cached
+# profile snapshot), e.g. `await async_db.get_employment(db_path, 1)`. Calls
+# run one at a time on a dedicated thread, which owns its pooled connections,
+# so event loop code never blocks on SQLite and never shares a connection.
+
+_state = {"executor": None}
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    with _executor_lock:
+        if _state["executor"] is None:
+            _state["executor"] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="db"
+            )
+        return _state["executor"]
+
+
+async def run(fn, *args, **kwargs):
+    """Awaits fn(*args, **kwargs) run on the database thread.
+
+    Use this to run several db_manager calls in one transaction, by passing a
+    function that wraps them in `with connection(db_path):`.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(fn, *args, **kwargs)
+    )
+
+
+def _awaitable(fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def shutdown():
+    """Closes the database thread's connections and stops the thread.
+
+    A later call starts a new thread.
+    """
+    with _executor_lock:
+        executor, _state["executor"] = _state["executor"], None
+    if executor is not None:
+        executor.submit(close_connections).result()
+        executor.shutdown(wait=True)
+
+
+# One wrapper per public db_manager function (keep in sync when adding one)
+add_certification = _awaitable(db_manager.add_certification)
+add_coursework = _awaitable(db_manager.add_coursework)
+add_education = _awaitable(db_manager.add_education)
+add_employment = _awaitable(db_manager.add_employment)
+add_job_posting = _awaitable(db_manager.add_job_posting)
+add_personal_info = _awaitable(db_manager.add_personal_info)
+add_professional_development = _awaitable(db_manager.add_professional_development)
+add_project = _awaitable(db_manager.add_project)
+add_publication = _awaitable(db_manager.add_publication)
+add_skills = _awaitable(db_manager.add_skills)
+bulk_add_coursework = _awaitable(db_manager.bulk_add_coursework)
+bulk_insert = _awaitable(db_manager.bulk_insert)
+delete_and_reset_ids = _awaitable(db_manager.delete_and_reset_ids)
+execute_query = _awaitable(db_manager.execute_query)
+fetch_data = _awaitable(db_manager.fetch_data)
+fetch_one_data = _awaitable(db_manager.fetch_one_data)
+get_certifications = _awaitable(db_manager.get_certifications)
+get_education = _awaitable(db_manager.get_education)
+get_education_with_coursework = _awaitable(db_manager.get_education_with_coursework)
+get_employment = _awaitable(db_manager.get_employment)
+get_employment_many = _awaitable(db_manager.get_employment_many)
+get_job_posting = _awaitable(db_manager.get_job_posting)
+get_job_postings = _awaitable(db_manager.get_job_postings)
+get_person_info = _awaitable(db_manager.get_person_info)
+get_personal_info = _awaitable(db_manager.get_personal_info)
+get_professional_development = _awaitable(db_manager.get_professional_development)
+get_projects = _awaitable(db_manager.get_projects)
+get_publications = _awaitable(db_manager.get_publications)
+get_resume_snapshot = _awaitable(db_manager.get_resume_snapshot)
+get_resume_snapshots = _awaitable(db_manager.get_resume_snapshots)
+get_schema = _awaitable(db_manager.get_schema)
+get_skills = _awaitable(db_manager.get_skills)
+search_profile = _awaitable(db_manager.search_profile)
+get_cached_snapshot = _awaitable(_get_cached_snapshot)
@@ -0,0 +1,211 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from db_connection import close_connections, connection, set_pooling
+from db_loader_generic import SAMPLE_PROFILE, load_generic
+from db_manager import (
+    add_employment,
+    add_personal_info,
+    get_education,
+    get_employment,
+    get_person_info,
+    get_professional_development,
+    get_projects,
+    get_publications,
+    get_resume_snapshot,
+    get_resume_snapshots,
+    get_skills,
+)
+from profile_loader import load_profile
+from resume_builder import fetch_resume_data
+from setup_db import db_builder
+
+
+def time_calls(fn, repeat):
+    """Returns the mean wall time of fn() in milliseconds over repeat calls."""
+    fn()  # Warm up caches before timing
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def bench_connection_pooling(db_path, person_id, repeat):
+    """Compares the per-section profile reads with one connection per query vs. pooled."""
+    results = {}
+    for label, pooled in (("connect per query", False), ("pooled connection", True)):
+        set_pooling(pooled)
+        results[label] = time_calls(
+            lambda: fetch_by_section(db_path, person_id), repeat
+        )
+    close_connections()
+    return results
+
+
+def fetch_by_section(db_path, person_id):
+    """The per-section reads fetch_resume_data made before snapshots existed."""
+    full_name, email, linkedin, github = get_person_info(db_path, person_id)
+    return {
+        "full_name": full_name,
+        "email": email,
+        "linkedin": linkedin,
+        "github": github,
+        "education": get_education(db_path, person_id),
+        "employment": get_employment(db_path, person_id),
+        "publications": get_publications(db_path, person_id),
+        "projects": get_projects(
+            db_path, person_id, fields=["Data Science"], exclude_fields=["Personal"]
+        ),
+        "personal_projects": get_projects(db_path, person_id, types=["Personal"]),
+        "professional_development": get_professional_development(db_path, person_id),
+        "skills": get_skills(db_path, person_id),
+    }
+
+
+def bench_resume_snapshot(db_path, person_id, repeat):
+    """Compares eight per-section queries, one snapshot query and the profile cache."""
+    return {
+        "per-section queries": time_calls(
+            lambda: fetch_by_section(db_path, person_id), repeat
+        ),
+        "get_resume_snapshot": time_calls(
+            lambda: get_resume_snapshot(db_path, person_id), repeat
+        ),
+        "fetch_resume_data (cached)": time_calls(
+            lambda: fetch_resume_data(db_path, person_id), repeat
+        ),
+    }
+
+
+def write_synthetic_profile(seed_file, jobs, bullets):
+    """Writes a JSONL profile with jobs * (bullets + 1) + 1 rows."""
+    with open(seed_file, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"section": "personal_info", "full_name": "Synthetic"}))
+        for job in range(jobs):
+            f.write(
+                "\n"
+                + json.dumps(
+                    {
+                        "section": "employment",
+                        "company": f"Company {job}",
+                        "job_title": "Analyst",
+                        "start_date": f"Jan. {2000 + job % 20}",
+                        "end_date": "Current",
+                        "field": "Data Science",
+                    }
+                )
+            )
+            for bullet in range(bullets):
+                f.write(
+                    "\n"
+                    + json.dumps(
+                        {
+                            "section": "responsibilities",
+                            "description": f"Responsibility {bullet} at job {job}",
+                            "field": "Data Science",
+                        }
+                    )
+                )
+
+
+def load_with_helpers(db_path, seed_file):
+    """Loads a synthetic profile through the per-record add_* helpers."""
+    with open(seed_file, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    with connection(db_path):
+        add_personal_info(db_path, "Synthetic", None, None, None, None, None)
+        jobs = [record for record in records if record["section"] == "employment"]
+        bullets = len(records) // len(jobs) - 1
+        for job in jobs:
+            add_employment(
+                db_path,
+                1,
+                job["company"],
+                None,
+                job["job_title"],
+                job["start_date"],
+                job["end_date"],
+                job["field"],
+                [f"Responsibility {b} at job {job['company']}" for b in range(bullets)],
+                ["Data Science"] * bullets,
+            )
+
+
+def bench_load_profile(tmp, jobs=10000, bullets=4):
+    """Times loading a ~50k-row profile with add_* helpers vs load_profile."""
+    seed_file = os.path.join(tmp, "synthetic_profile.jsonl")
+    write_synthetic_profile(seed_file, jobs, bullets)
+    results = {}
+    for label, load in (
+        ("add_* helpers", load_with_helpers),
+        ("load_profile", load_profile),
+    ):
+        db_path = os.path.join(tmp, f"load_{len(results)}.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            db_builder(db_path)
+            start = time.perf_counter()
+            load(db_path, seed_file)
+        results[label] = (time.perf_counter() - start) * 1000
+    close_connections()
+    return results
+
+
+def bench_many_people(tmp, people, repeat):
+    """Compares one snapshot query per person with one batched query for all."""
+    db_path = os.path.join(tmp, "people.db")
+    seed_file = os.path.join(tmp, "people.json")
+    with open(SAMPLE_PROFILE, encoding="utf-8") as f:
+        profile = json.load(f)
+    with open(seed_file, "w", encoding="utf-8") as f:
+        json.dump([profile] * people, f)
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_profile(db_path, seed_file)
+
+    ids = list(range(1, people + 1))
+    return {
+        "get_resume_snapshot x N": time_calls(
+            lambda: [get_resume_snapshot(db_path, person_id) for person_id in ids],
+            repeat,
+        ),
+        "get_resume_snapshots": time_calls(
+            lambda: get_resume_snapshots(db_path, ids), repeat
+        ),
+    }
+
+
+def print_results(title, results):
+    print(f"\n{title}")
+    baseline = next(iter(results.values()))
+    for label, ms in results.items():
+        print(f"  {label:<28} {ms:8.3f} ms  ({baseline / ms:5.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume database benchmarks")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "resume_bench.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            load_generic(db_path)
+
+        print_results(
+            "Connection pooling", bench_connection_pooling(db_path, 1, args.repeat)
+        )
+        print_results(
+            "Resume profile read", bench_resume_snapshot(db_path, 1, args.repeat)
+        )
+        print_results("Loading a 50k-row profile", bench_load_profile(tmp))
+        print_results(
+            "Reading 200 profiles",
+            bench_many_people(tmp, 200, max(1, args.repeat // 20)),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import itertools
+import os
+import tempfile
+import time
+import numpy as np
+from model_registry import DEFAULT_MODEL, model_source
+from onnx_encoder import OnnxEncoder, export_onnx
+
+# Synthetic resume bullets: every combination of these phrases
+ACTIONS = [
+    "Built",
+    "Maintained",
+    "Led the migration of",
+    "Automated testing for",
+    "Reduced costs of",
+    "Documented",
+    "Designed dashboards for",
+    "Trained staff on",
+]
+SUBJECTS = [
+    "the customer billing system",
+    "data pipelines in Python and SQL",
+    "a React web application",
+    "warehouse inventory tracking",
+    "machine learning models for churn prediction",
+    "the hospital scheduling process",
+    "cloud infrastructure on AWS",
+    "a retail sales team of twelve",
+]
+OUTCOMES = ["", ", cutting turnaround by 30%", " used by 5,000 customers"]
+
+POSTINGS = [
+    "Data Engineer: build and maintain ETL pipelines in Python and SQL on AWS.",
+    "Frontend Developer with React experience to design customer dashboards.",
+    "Store Manager to lead a retail team, train staff and control costs.",
+    "ML Engineer to deploy churn and forecasting models to production.",
+    "Operations Analyst to automate scheduling and inventory reporting.",
+]
+
+
+def synthetic_bullets():
+    return [
+        f"{action} {subject}{outcome}"
+        for action, subject, outcome in itertools.product(ACTIONS, SUBJECTS, OUTCOMES)
+    ]
+
+
+def bench_encoder(encoder, bullets, repeat):
+    """Returns (bullets/s encoding the corpus, p95 ms to encode one posting)."""
+    encoder.encode(bullets[:32])  # Warm up before timing
+    start = time.perf_counter()
+    encoder.encode(bullets, batch_size=32)
+    throughput = len(bullets) / (time.perf_counter() - start)
+
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        encoder.encode([POSTINGS[i % len(POSTINGS)]])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return throughput, float(np.percentile(latencies, 95))
+
+
+def top_k(encoder, bullets, k):
+    """Returns the indexes of the k best bullets for each posting."""
+    vectors = np.asarray(encoder.encode(bullets), dtype=np.float32)
+    postings = np.asarray(encoder.encode(POSTINGS), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    postings /= np.linalg.norm(postings, axis=1, keepdims=True)
+    scores = postings @ vectors.T
+    return [set(np.argsort(-row)[:k]) for row in scores]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentence encoder backend benchmark")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument(
+        "--onnx-dir",
+        help="An export_onnx directory (exported to a temp dir if omitted)",
+    )
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    bullets = synthetic_bullets()
+    with tempfile.TemporaryDirectory() as tmp:
+        onnx_dir = args.onnx_dir or export_onnx(
+            model_source(args.model), os.path.join(tmp, "onnx")
+        )
+        encoders = {
+            "torch fp32": SentenceTransformer(model_source(args.model), device="cpu"),
+            "onnx fp32": OnnxEncoder(onnx_dir, quantized=False),
+            "onnx int8": OnnxEncoder(onnx_dir, quantized=True),
+        }
+
+        baseline = top_k(encoders["torch fp32"], bullets, args.top_k)
+        print(
+            f"\n{len(bullets)} bullets, {len(POSTINGS)} postings, "
+            f"{args.repeat} single-posting encodes"
+        )
+        for label, encoder in encoders.items():
+            throughput, p95 = bench_encoder(encoder, bullets, args.repeat)
+            ranked = top_k(encoder, bullets, args.top_k)
+            agreement = np.mean(
+                [len(a & b) / args.top_k for a, b in zip(baseline, ranked)]
+            )
+            print(
+                f"  {label:<12} {throughput:8.0f} bullets/s  p95 {p95:7.2f} ms  "
+                f"top-{args.top_k} agreement {agreement:6.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
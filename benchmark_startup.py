@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules whose import cost seconds; none should load before they are used
+HEAVY_MODULES = ["torch", "sentence_transformers", "openai", "dotenv", "requests"]
+
+# Imported in a fresh interpreter each run, cheapest first
+MODULES = [
+    "job_relavancy_scorer",
+    "job_posting_scraper_ai",
+    "resume_builder",
+    "torch",
+    "sentence_transformers",
+    "openai",
+]
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def time_import(module, repeat):
+    """Returns (median import seconds, heavy modules loaded).
+
+    Raises subprocess.CalledProcessError if the module fails to import.
+    """
+    code = _CHILD.format(module=module, heavy=HEAVY_MODULES)
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True,
+        )
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        times.append(report["seconds"])
+    return statistics.median(times), report["heavy"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"\nCold import time (median of {args.repeat} fresh interpreters)")
+    for module in MODULES:
+        try:
+            seconds, heavy = time_import(module, args.repeat)
+        except subprocess.CalledProcessError as e:
+            error = (e.stderr.strip().splitlines() or [f"exit status {e.returncode}"])[
+                -1
+            ]
+            print(f"  {module:<24} unavailable: {error}")
+            continue
+        loaded = ", ".join(heavy) or "none"
+        print(f"  {module:<24} {seconds * 1000:8.1f} ms  heavy modules: {loaded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+
+# Sort key stored for dates such as "Current" so ongoing entries sort first
+PRESENT_MONTH = 999912
+
+ONGOING_WORDS = {"current", "present", "now", "ongoing"}
+
+MONTH_NAMES = (
+    "january",
+    "february",
+    "march",
+    "april",
+    "may",
+    "june",
+    "july",
+    "august",
+    "september",
+    "october",
+    "november",
+    "december",
+)
+
+_YEAR = re.compile(r"(19\d{2}|20\d{2})")
+_WORD = re.compile(r"[a-z]+")
+_ISO = re.compile(r"(19\d{2}|20\d{2})-(\d{1,2})")
+_NUMERIC = re.compile(r"(\d{1,2})/(?:\d{1,2}/)?(19\d{2}|20\d{2})")
+
+
+@lru_cache(maxsize=4096)
+def parse_month(date_str):
+    """Normalizes a free-text date into a sortable YYYYMM integer.
+
+    Handles 'Jan. 2010', 'June 2020', '2020-06', '06/2020', '6/15/2020' and
+    bare years (month 00). 'Current'-style values map to PRESENT_MONTH and
+    anything without a year returns None.
+    """
+    if date_str is None:
+        return None
+    if isinstance(date_str, int):
+        return date_str * 100 if date_str < 10000 else date_str
+
+    text = str(date_str).strip().lower()
+    if text in ONGOING_WORDS:
+        return PRESENT_MONTH
+
+    match = _ISO.search(text)
+    if match and 1 <= int(match.group(2)) <= 12:
+        return int(match.group(1)) * 100 + int(match.group(2))
+
+    match = _NUMERIC.search(text)
+    if match and 1 <= int(match.group(1)) <= 12:
+        return int(match.group(2)) * 100 + int(match.group(1))
+
+    year = _YEAR.search(text)
+    if not year:
+        return None
+    return int(year.group(0)) * 100 + _month_number(text)
+
+
+def _month_number(text):
+    """Returns the first month named (or abbreviated) in text, or 0."""
+    for word in _WORD.findall(text):
+        if len(word) >= 3:
+            for number, name in enumerate(MONTH_NAMES, start=1):
+                if name.startswith(word):
+                    return number
+    return 0
+
+
+def month_to_year(month):
+    """Returns the calendar year of a YYYYMM value (the current year if ongoing)."""
+    if month is None:
+        return None
+    if month == PRESENT_MONTH:
+        return datetime.now().year
+    return month // 100
@@ -0,0 +1,226 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import query_stats
+
+# Number of prepared statements each pooled connection keeps compiled
+STATEMENT_CACHE_SIZE = 256
+
+# Opt-in settings for several processes sharing one database file: WAL lets
+# readers run alongside a writer and busy_timeout waits out short write locks
+CONCURRENCY_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,
+}
+
+_local = threading.local()
+_settings = {"pooling": True, "concurrency": False}
+_write_listeners = []
+
+
+class _PooledConnection:
+    """A thread-owned connection plus the bookkeeping needed to reuse it."""
+
+    __slots__ = ("conn", "identity", "depth", "changes", "data_version")
+
+    def __init__(self, conn, identity):
+        self.conn = conn
+        self.identity = identity
+        self.depth = 0
+        self.changes = 0
+        self.data_version = None
+
+
+def database_key(path):
+    """Returns the key a database path is pooled and cached under."""
+    if path == ":memory:" or str(path).startswith("file:"):
+        return path
+    return os.path.abspath(path)
+
+
+def _file_identity(path):
+    """Returns (device, inode) for an on-disk database, or None."""
+    if path == ":memory:" or str(path).startswith("file:"):
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def apply_concurrency_profile(conn):
+    """Applies CONCURRENCY_PRAGMAS to an open connection."""
+    for name, value in CONCURRENCY_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def _open(path):
+    conn = sqlite3.connect(
+        path,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        uri=str(path).startswith("file:"),
+        factory=(
+            query_stats.InstrumentedConnection
+            if query_stats.is_enabled()
+            else sqlite3.Connection
+        ),
+    )
+    if _settings["concurrency"]:
+        apply_concurrency_profile(conn)
+        # Take the write lock when a write transaction starts, so a busy
+        # writer is waited on instead of failing on lock upgrade
+        conn.isolation_level = "IMMEDIATE"
+    return _PooledConnection(conn, _file_identity(path))
+
+
+def _thread_pool(name):
+    """Returns the calling thread's named dict of connections (pool or watchers)."""
+    if getattr(_local, "pid", None) != os.getpid():
+        # A forked child must not share its parent's connections
+        _local.pool, _local.watchers = {}, {}
+        _local.pid = os.getpid()
+    return getattr(_local, name)
+
+
+def _checkout(path, pool_name="pool"):
+    """Returns the calling thread's connection for path, opening it if needed.
+
+    A pooled connection is discarded when the database file it was opened on
+    has been deleted or replaced (e.g. by a rebuild), so callers never read
+    from a stale inode.
+    """
+    pool = _thread_pool(pool_name)
+    key = database_key(path)
+    entry = pool.get(key)
+    if entry is not None and entry.depth == 0:
+        if entry.identity != _file_identity(path):
+            entry.conn.close()
+            entry = None
+    if entry is None:
+        entry = pool[key] = _open(path)
+    return key, entry
+
+
+@contextmanager
+def connection(path, notify=True):
+    """Yields a reusable connection to the database at path.
+
+    The block runs as one transaction: it is committed when the block exits
+    normally and rolled back if it raises. Nested blocks on the same path
+    run inside a savepoint of the outer transaction, so an inner failure only
+    undoes the inner block and only the outermost block commits.
+
+    With notify=False, rows written in the block don't run the write
+    listeners; use it for derived data (e.g. embedding caches) that cached
+    profile reads don't depend on.
+    """
+    key, entry = _checkout(path)
+    conn = entry.conn
+    savepoint = None
+    changes_before = conn.total_changes
+    if not entry.depth:
+        entry.changes = changes_before
+    else:
+        if not conn.in_transaction:
+            conn.execute(f"BEGIN {conn.isolation_level}")
+        savepoint = f"sp_{entry.depth}"
+        conn.execute(f"SAVEPOINT {savepoint}")
+    entry.depth += 1
+    try:
+        yield conn
+    except BaseException:
+        entry.depth -= 1
+        if savepoint:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+        else:
+            conn.rollback()
+        raise
+    else:
+        entry.depth -= 1
+        if savepoint:
+            conn.execute(f"RELEASE {savepoint}")
+        else:
+            conn.commit()
+    finally:
+        if not notify:
+            # Count this block's writes as already seen
+            entry.changes += conn.total_changes - changes_before
+        if entry.depth == 0:
+            if conn.total_changes != entry.changes:
+                _notify(key)
+            if not _settings["pooling"]:
+                _local.pool.pop(key, None)
+                conn.close()
+
+
+def _notify(key):
+    for listener in _write_listeners:
+        listener(key)
+
+
+def notify_write(path):
+    """Runs the write listeners for path after a change connection() can't see.
+
+    Used after overwriting a database with the backup API, which doesn't
+    count towards total_changes.
+    """
+    _notify(database_key(path))
+
+
+def add_write_listener(listener):
+    """Registers listener(key) to run after a transaction that wrote rows ends.
+
+    key is database_key(path). Listeners run for commits and rollbacks alike,
+    since either may leave previously read data out of date.
+    """
+    _write_listeners.append(listener)
+
+
+def data_changed(path):
+    """Returns True if the database may have changed since this thread last asked.
+
+    Uses PRAGMA data_version, which moves when any other connection (including
+    other processes) commits. A freshly opened connection always reports True.
+    With pooling off, the check runs on a connection kept open for it, since
+    connection() closes its own after every block.
+    """
+    if _settings["pooling"]:
+        _, entry = _checkout(path)
+        with connection(path) as conn:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+    else:
+        _, entry = _checkout(path, "watchers")
+        version = entry.conn.execute("PRAGMA data_version").fetchone()[0]
+    changed = version != entry.data_version
+    entry.data_version = version
+    return changed
+
+
+def close_connections(path=None):
+    """Closes the calling thread's pooled connections (all, or just path's)."""
+    if getattr(_local, "pid", None) != os.getpid():
+        return
+    for pool in (_local.pool, _local.watchers):
+        keys = list(pool) if path is None else [database_key(path)]
+        for key in keys:
+            entry = pool.pop(key, None)
+            if entry is not None:
+                entry.conn.close()
+
+
+def set_concurrency_profile(enabled):
+    """Turns the WAL/busy_timeout profile on or off for connections opened from now on."""
+    _settings["concurrency"] = enabled
+    close_connections()
+
+
+def set_pooling(enabled):
+    """Turns connection reuse on or off (off opens one connection per call)."""
+    _settings["pooling"] = enabled
+    if not enabled:
+        close_connections()
@@ -1,33 +1,86 @@
+import json
+import re
 import sqlite3
+from db_connection import connection
+from date_parser import parse_month
+from posting_url import canonical_url
+from setup_db import match_expression
+from db_records import (
+    CertificationRecord,
+    EducationRecord,
+    EmploymentRecord,
+    JobPosting,
+    PersonInfo,
+    ProfessionalDevelopmentRecord,
+    ProjectRecord,
+    PublicationRecord,
+    SearchHit,
+    SkillRecord,
+    record_factory,
+)
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _aggregate(column, as_lists):
+    """Returns the SQL that collects a child column into one value per parent.
+
+    The legacy form is a ';'-joined string; with as_lists it is a JSON array
+    that _split_last_column turns into a Python list.
+    """
+    if as_lists:
+        return f"json_group_array({column}) FILTER (WHERE {column} IS NOT NULL)"
+    return f"GROUP_CONCAT({column}, ';')"
+
+
+def _split_last_column(rows):
+    """Decodes the JSON array in the last column of each row into a list."""
+    return [type(row)._make((*row[:-1], json.loads(row[-1]))) for row in rows]
 
 
 def execute_query(path, query, params=()):
     """Executes a given SQL query with optional parameters."""
-    conn = sqlite3.connect(path)
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    conn.commit()
-    conn.close()
+    with connection(path) as conn:
+        conn.execute(query, params)
 
 
-def fetch_data(path, query, params=()):
-    """Fetches data based on a given SQL query."""
-    conn = sqlite3.connect(path)
+def _cursor(conn, record):
+    """Returns a cursor that builds rows as record (plain tuples if None)."""
     cursor = conn.cursor()
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    if record is not None:
+        cursor.row_factory = record_factory(record)
+    return cursor
 
 
-def fetch_one_data(path, query, params=()):
-    """Fetches data based on a given SQL query."""
-    conn = sqlite3.connect(path)
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    results = cursor.fetchone()
-    conn.close()
-    return results
+def fetch_data(path, query, params=(), record=None):
+    """Fetches data based on a given SQL query, optionally as db_records rows."""
+    with connection(path) as conn:
+        return _cursor(conn, record).execute(query, params).fetchall()
+
+
+def fetch_one_data(path, query, params=(), record=None):
+    """Fetches data based on a given SQL query, optionally as a db_records row."""
+    with connection(path) as conn:
+        return _cursor(conn, record).execute(query, params).fetchone()
+
+
+def bulk_insert(path, table, columns, rows):
+    """Streams rows into table within a single transaction.
+
+    rows is any iterable of value sequences ordered like columns; it is
+    consumed lazily by executemany. Returns the ids of the inserted rows,
+    which are consecutive because the whole batch is written under one lock.
+    """
+    for name in (table, *columns):
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid SQL identifier: {name!r}")
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    with connection(path) as conn:
+        count = conn.executemany(query, rows).rowcount
+        if count <= 0:
+            return []
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last_id - count + 1, last_id + 1))
 
 
 # Example: Adding a new personal info record
@@ -53,25 +106,23 @@ def get_person_info(path, person_id):
     SELECT full_name, email, linkedin, github 
     FROM Personal_Info WHERE id = ?
     """
-    result = fetch_one_data(path, query, (person_id,))
+    result = fetch_one_data(path, query, (person_id,), PersonInfo)
     return result
 
 
 def delete_and_reset_ids(path, table, row_id):
     """Deletes a row and resets ID values to maintain sequential order."""
-    conn = sqlite3.connect(path)
-    cursor = conn.cursor()
+    with connection(path) as conn:
+        cursor = conn.cursor()
 
-    # Delete the specified row
-    cursor.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
+        # Delete the specified row
+        cursor.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
 
-    # Reset ID sequence by recreating the table without the deleted row
-    cursor.execute(
-        f"DELETE FROM sqlite_sequence WHERE name='{table}'"
-    )  # Resets autoincrement counter
+        # Reset ID sequence by recreating the table without the deleted row
+        cursor.execute(
+            f"DELETE FROM sqlite_sequence WHERE name='{table}'"
+        )  # Resets autoincrement counter
 
-    conn.commit()
-    conn.close()
     print(f"Row {row_id} deleted and IDs reset in {table}.")
 
 
@@ -96,12 +147,10 @@ def add_education(
         f"Education record added for Person ID {person_id} at {institution} from {graduation_year} with gpa of {graduation_gpa}"
     )
     # Retrieve the last inserted education_id
-    conn = sqlite3.connect(path)
-    cursor = conn.cursor()
     query = """SELECT id FROM Education WHERE degree = ? AND institution = ?"""
-    cursor.execute(query, (degree, institution))
-    education_id = cursor.fetchone()[0]  # Fetch one matching record
-    conn.close()
+    education_id = fetch_one_data(path, query, (degree, institution))[
+        0
+    ]  # Fetch one matching record
     print(education_id)
     return education_id
 
@@ -121,15 +170,60 @@ def add_coursework(
     )
 
 
-def get_education(path, person_id):
-    """Fetches education records for a person."""
-    query = """
+def bulk_add_coursework(path, rows):
+    """Adds many coursework entries in one transaction and returns their ids.
+
+    Each row is (education_id, course_name, course_id, term, year, gpa,
+    course_credits, field), matching the arguments of add_coursework.
+    """
+    course_ids = bulk_insert(
+        path,
+        "Coursework",
+        (
+            "education_id",
+            "course_name",
+            "course_id",
+            "term",
+            "year",
+            "gpa",
+            "course_credits",
+            "field",
+        ),
+        rows,
+    )
+    print(f"Added {len(course_ids)} courses.")
+    return course_ids
+
+
+class _PersonColumn(str):
+    """SQL naming the person of an outer query.
+
+    Query builders given one in place of a person_id correlate their query
+    with it, so a single statement can cover a list of people.
+    """
+
+
+def _person(person_id):
+    """Returns the SQL and params that match person_id in a query builder."""
+    if isinstance(person_id, _PersonColumn):
+        return person_id, []
+    return "?", [person_id]
+
+
+def _education_query(person_id):
+    person, params = _person(person_id)
+    query = f"""
         SELECT Education.degree, Education.institution, Education.graduation_year, Education.graduation_gpa
         FROM Education
-        WHERE Education.person_id = ?
+        WHERE Education.person_id = {person}
         ORDER BY Education.graduation_year DESC
     """
-    return fetch_data(path, query, (person_id,))
+    return query, params
+
+
+def get_education(path, person_id):
+    """Fetches education records for a person."""
+    return fetch_data(path, *_education_query(person_id), EducationRecord)
 
 
 def get_education_with_coursework(path, person_id):
@@ -171,15 +265,20 @@ def add_publication(
     )
 
 
-def get_publications(path, person_id):
-    """Fetches publication records for a person."""
-    query = """
+def _publications_query(person_id):
+    person, params = _person(person_id)
+    query = f"""
         SELECT Publications.title, Publications.authors, Publications.publication_date, Publications.venue, Publications.edition, Publications.pages
         FROM Publications
-        WHERE Publications.person_id = ?
+        WHERE Publications.person_id = {person}
         ORDER BY Publications.publication_date DESC
     """
-    return fetch_data(path, query, (person_id,))
+    return query, params
+
+
+def get_publications(path, person_id):
+    """Fetches publication records for a person."""
+    return fetch_data(path, *_publications_query(person_id), PublicationRecord)
 
 
 def add_certification(
@@ -221,7 +320,7 @@ def get_certifications(path, person_id):
         WHERE Certifications.person_id = ?
         ORDER BY Certifications.date_obtained DESC
     """
-    return fetch_data(path, query, (person_id,))
+    return fetch_data(path, query, (person_id,), CertificationRecord)
 
 
 def add_employment(
@@ -237,63 +336,79 @@ def add_employment(
     fields,
 ):
     """Adds an employment entry and associated responsibilities."""
-    conn = sqlite3.connect(path)
-    cursor = conn.cursor()
-
     try:
-        # Insert job details
-        cursor.execute(
-            """
-            INSERT INTO Employment (person_id, company, location, job_title, start_date, end_date, field)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (person_id, company, location, job_title, start_date, end_date, field),
-        )
+        with connection(path) as conn:
+            cursor = conn.cursor()
 
-        employment_id = cursor.lastrowid  # Get the last inserted job ID
-
-        # Insert responsibilities only if lists are not empty
-        if responsibilities and fields:
-            data = [
-                (employment_id, desc, field)
-                for desc, field in zip(responsibilities, fields)
-            ]
-            cursor.executemany(
-                "INSERT INTO Responsibilities (employment_id, description, field) VALUES (?, ?, ?)",
-                data,
+            # Insert job details
+            cursor.execute(
+                """
+                INSERT INTO Employment (person_id, company, location, job_title, start_date, end_date, field, start_month, end_month)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    person_id,
+                    company,
+                    location,
+                    job_title,
+                    start_date,
+                    end_date,
+                    field,
+                    parse_month(start_date),
+                    parse_month(end_date),
+                ),
             )
 
-        conn.commit()
+            employment_id = cursor.lastrowid  # Get the last inserted job ID
+
+            # Insert responsibilities only if lists are not empty
+            if responsibilities and fields:
+                data = [
+                    (employment_id, desc, field)
+                    for desc, field in zip(responsibilities, fields)
+                ]
+                cursor.executemany(
+                    "INSERT INTO Responsibilities (employment_id, description, field) VALUES (?, ?, ?)",
+                    data,
+                )
+
         print(
             f"✅ Added job at {company} ({job_title}) with {len(responsibilities)} responsibilities."
         )
 
     except sqlite3.Error as e:
-        conn.rollback()  # Undo changes if there's an error
+        # The connection manager has already rolled back the partial insert
         print(f"❌ Database error: {e}")
 
-    finally:
-        conn.close()  # Ensure the connection is closed
-
 
-def get_employment(path, person_id, filters=None):
-    """Fetches employment history along with filtered responsibilities."""
+def _employment_query(person_id, filters=None, as_lists=False):
     if filters is None:
         filters = {}
     fields = filters["filters"] if "field" in filters else None
     exclude_fields = filters["exclude_fields"] if "exclude_fields" in filters else None
     resp_fields = filters["resp_fields"] if "resp_fields" in filters else None
-    # Base query
-    query = """
+    # Responsibilities are concatenated per position in a correlated
+    # subquery, so positions come straight off the (person_id, end_month)
+    # index in order without a GROUP BY sort
+    person, person_params = _person(person_id)
+    resp_filter = ""
+    resp_params = []
+    if resp_fields:
+        resp_filter = f" AND R.field IN ({','.join('?' * len(resp_fields))})"
+        resp_params = list(resp_fields)
+
+    query = f"""
         SELECT 
             E.company, E.location, E.job_title, E.start_date, E.end_date, E.field, 
-            COALESCE(GROUP_CONCAT(R.description, ';'), '') AS responsibilities
+            COALESCE((
+                SELECT {_aggregate("R.description", as_lists)} FROM Responsibilities AS R
+                WHERE R.employment_id = E.id{resp_filter}
+            ), '') AS responsibilities
         FROM Employment AS E 
-        LEFT JOIN Responsibilities AS R ON R.employment_id = E.id
-        WHERE E.person_id = ?
+        WHERE E.person_id = {person}
     """
 
-    params = [person_id]
+    params = resp_params + person_params
 
     # Filter employment fields
     if fields:
@@ -306,43 +421,38 @@ def get_employment(path, person_id, filters=None):
         query += f" AND E.field NOT IN ({placeholders})"
         params.extend(exclude_fields)
 
-    # Filter responsibilities field
+    # Filter responsibilities field, dropping positions with no matching duties
     if resp_fields:
-        placeholders = ",".join("?" * len(resp_fields))
-        query += f" AND R.field IN ({placeholders})"
+        query += f""" AND EXISTS (
+            SELECT 1 FROM Responsibilities AS R
+            WHERE R.employment_id = E.id{resp_filter}
+        )"""
         params.extend(resp_fields)
 
-    # Grouping & Ordering
-    query += """
-        GROUP BY E.id, E.company, E.location, E.job_title, E.start_date, E.end_date, E.field
-        ORDER BY 
-            SUBSTR(E.end_date, -4) || 
-            CASE 
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Jan' THEN '-01'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Feb' THEN '-02'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Mar' THEN '-03'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Apr' THEN '-04'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'May' THEN '-05'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Jun' THEN '-06'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Jul' THEN '-07'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Aug' THEN '-08'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Sep' THEN '-09'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Oct' THEN '-10'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Nov' THEN '-11'
-                WHEN SUBSTR(E.end_date, 1, 3) = 'Dec' THEN '-12'
-            END DESC;
+    # Most recent first; ongoing positions carry PRESENT_MONTH
+    query += " ORDER BY E.end_month DESC, E.start_month DESC"
+    return query, params
+
+
+def get_employment(path, person_id, filters=None, as_lists=False):
+    """Fetches employment history along with filtered responsibilities.
+
+    Responsibilities come back as one ';'-joined string, or as a list of
+    strings when as_lists is True.
     """
+    query, params = _employment_query(person_id, filters, as_lists)
 
     try:
-        with sqlite3.connect(path) as conn:
-            cursor = conn.cursor()
+        with connection(path) as conn:
+            cursor = _cursor(conn, EmploymentRecord)
 
             # # Debugging output
             # print("Executing SQL query:\n", query)
             # print("With parameters:", params)
 
             cursor.execute(query, params)
-            return cursor.fetchall()
+            rows = cursor.fetchall()
+            return _split_last_column(rows) if as_lists else rows
 
     except sqlite3.Error as e:
         print(f"❌ Database error: {e}")
@@ -361,14 +471,14 @@ def add_professional_development(
 ):
     """Adds a professional development entry to the database."""
     try:
-        with sqlite3.connect(path) as conn:
+        with connection(path) as conn:
             cursor = conn.cursor()
 
             # Insert professional development entry
             cursor.execute(
                 """
-                INSERT INTO ProfessionalDevelopment (person_id, certification_name, issuing_organization, date_completed, context, field)
-                VALUES (?, ?, ?, ?, ?, ?)
+                INSERT INTO ProfessionalDevelopment (person_id, certification_name, issuing_organization, date_completed, context, field, completed_month)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     person_id,
@@ -377,6 +487,7 @@ def add_professional_development(
                     date_completed,
                     context,
                     field,
+                    parse_month(date_completed),
                 ),
             )
             prof_dev_id = cursor.lastrowid  # Get the last inserted ID
@@ -388,7 +499,6 @@ def add_professional_development(
                     "INSERT INTO PDCovered (prof_dev_id, covered) VALUES (?, ?)", data
                 )
 
-            conn.commit()
             print(
                 f"✅ Added certification: {context} '{certification_name}' from {issuing_organization} "
                 f"completed in {date_completed} for person_id: {person_id}, field: {field}"
@@ -398,37 +508,30 @@ def add_professional_development(
         print(f"❌ Database error: {e}")
 
 
-def get_professional_development(path, person_id):
-    """Fetches professional development records for a person."""
-    query = """
+def _professional_development_query(person_id, as_lists=False):
+    person, params = _person(person_id)
+    query = f"""
         SELECT PD.certification_name, PD.issuing_organization, PD.date_completed, PD.context, PD.field, 
-               GROUP_CONCAT(C.covered, ';') AS covered 
+               (SELECT {_aggregate("C.covered", as_lists)} FROM PDCovered AS C WHERE C.prof_dev_id = PD.id) AS covered 
         FROM ProfessionalDevelopment AS PD
-        LEFT JOIN PDCovered AS C ON C.prof_dev_id = PD.id
-        WHERE PD.person_id = ?
-        GROUP BY PD.id
-        ORDER BY 
-        SUBSTR(PD.date_completed, -4) || 
-        CASE 
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Jan' THEN '-01'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Feb' THEN '-02'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Mar' THEN '-03'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Apr' THEN '-04'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'May' THEN '-05'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Jun' THEN '-06'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Jul' THEN '-07'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Aug' THEN '-08'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Sep' THEN '-09'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Oct' THEN '-10'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Nov' THEN '-11'
-            WHEN SUBSTR(PD.date_completed, 1, 3) = 'Dec' THEN '-12'
-        END DESC;
+        WHERE PD.person_id = {person}
+        ORDER BY PD.completed_month DESC
     """
+    return query, params
+
+
+def get_professional_development(path, person_id, as_lists=False):
+    """Fetches professional development records for a person.
+
+    Covered topics come back ';'-joined, or as a list when as_lists is True.
+    """
+    query, params = _professional_development_query(person_id, as_lists)
     try:
-        with sqlite3.connect(path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (person_id,))
-            return cursor.fetchall()
+        with connection(path) as conn:
+            cursor = _cursor(conn, ProfessionalDevelopmentRecord)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            return _split_last_column(rows) if as_lists else rows
 
     except sqlite3.Error as e:
         print(f"❌ Database error: {e}")
@@ -438,7 +541,7 @@ def get_professional_development(path, person_id):
 def add_skills(path, person_id, skill, details):
     """Adds a professional development entry to the database."""
     try:
-        with sqlite3.connect(path) as conn:
+        with connection(path) as conn:
             cursor = conn.cursor()
 
             # Insert professional development entry
@@ -461,27 +564,36 @@ def add_skills(path, person_id, skill, details):
                     "INSERT INTO SkillDetails (skill_id, detail) VALUES (?, ?)", data
                 )
 
-            conn.commit()
             print(f"✅ Added skill: {skill} for person_id: {person_id}")
 
     except sqlite3.Error as e:
         print(f"❌ Database error: {e}")
 
 
-def get_skills(path, person_id):
-    """Fetches professional development records for a person."""
-    query = """
-        SELECT S.skill, GROUP_CONCAT(D.detail, ';') AS details 
+def _skills_query(person_id, as_lists=False):
+    person, params = _person(person_id)
+    query = f"""
+        SELECT S.skill, {_aggregate("D.detail", as_lists)} AS details 
         FROM Skills AS S
         LEFT JOIN SkillDetails AS D ON D.skill_id = S.id
-        WHERE S.person_id = ?
+        WHERE S.person_id = {person}
         GROUP BY S.id
     """
+    return query, params
+
+
+def get_skills(path, person_id, as_lists=False):
+    """Fetches skills for a person.
+
+    Skill details come back ';'-joined, or as a list when as_lists is True.
+    """
+    query, params = _skills_query(person_id, as_lists)
     try:
-        with sqlite3.connect(path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (person_id,))
-            return cursor.fetchall()
+        with connection(path) as conn:
+            cursor = _cursor(conn, SkillRecord)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            return _split_last_column(rows) if as_lists else rows
 
     except sqlite3.Error as e:
         print(f"❌ Database error: {e}")
@@ -501,7 +613,7 @@ def add_project(
 ):
     """Adds a professional development entry to the database."""
     try:
-        with sqlite3.connect(path) as conn:
+        with connection(path) as conn:
             cursor = conn.cursor()
 
             # Insert professional development entry
@@ -530,27 +642,29 @@ def add_project(
                     data,
                 )
 
-            conn.commit()
             print(f"✅ Added project: {project_name} for person_id: {person_id}")
 
     except sqlite3.Error as e:
         print(f"❌ Database error: {e}")
 
 
-def get_projects(
-    path, person_id, fields=None, types=None, exclude_fields=None, exclude_types=None
+def _projects_query(
+    person_id,
+    fields=None,
+    types=None,
+    exclude_fields=None,
+    exclude_types=None,
+    as_lists=False,
 ):
-    """Fetches professional development records for a person, filtered by field and type."""
-    query = """
+    person, params = _person(person_id)
+    query = f"""
         SELECT P.project_name, P.year, P.technologies, P.project_link, P.field, P.project_type, 
-               GROUP_CONCAT(D.detail, ';') AS details 
+               {_aggregate("D.detail", as_lists)} AS details 
         FROM Projects AS P
         LEFT JOIN ProjectDetails AS D ON D.project_id = P.id
-        WHERE P.person_id = ?
+        WHERE P.person_id = {person}
     """
 
-    params = [person_id]
-
     if fields:
         query += f" AND P.field IN ({','.join('?' * len(fields))})"
         params.extend(fields)
@@ -568,79 +682,88 @@ def get_projects(
         params.extend(exclude_types)
 
     query += " GROUP BY P.id"
+    return query, params
+
 
+def get_projects(
+    path,
+    person_id,
+    fields=None,
+    types=None,
+    exclude_fields=None,
+    exclude_types=None,
+    as_lists=False,
+):
+    """Fetches projects for a person, filtered by field and type.
+
+    Project details come back ';'-joined, or as a list when as_lists is True.
+    """
+    query, params = _projects_query(
+        person_id, fields, types, exclude_fields, exclude_types, as_lists
+    )
     try:
-        with sqlite3.connect(path) as conn:
-            cursor = conn.cursor()
+        with connection(path) as conn:
+            cursor = _cursor(conn, ProjectRecord)
             cursor.execute(query, params)
-            return cursor.fetchall()
+            rows = cursor.fetchall()
+            return _split_last_column(rows) if as_lists else rows
 
     except sqlite3.Error as e:
         print(f"❌ Database error: {e}")
         return []
 
 
-def add_job_posting(db_path, job_data):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+_JOB_POSTING_COLUMNS = JobPosting._fields
 
-    cursor.execute(
-        """
-        INSERT INTO Job_Postings (
-            job_title, company_name, location, job_type, job_description,
-            responsibilities, requirements, preferred_qualifications, technologies,
-            soft_skills, salary_range, application_deadline, application_url,
-            posting_date, job_id, hiring_manager, hiring_address
-        ) VALUES (
-            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-        )
-    """,
-        (
-            job_data["job_title"],
-            job_data["company_name"],
-            job_data["location"],
-            job_data["job_type"],
-            job_data["job_description"],
-            job_data["responsibilities"],
-            job_data["requirements"],
-            job_data["preferred_qualifications"],
-            job_data["technologies"],
-            job_data["soft_skills"],
-            job_data["salary_range"],
-            job_data["application_deadline"],
-            job_data["application_url"],
-            job_data["posting_date"],
-            job_data["job_id"],
-            job_data["hiring_manager"],
-            job_data["hiring_address"],
-        ),
+
+def add_job_posting(db_path, job_data, posting_url=None):
+    """Inserts or refreshes a job posting and returns it as a JobPosting.
+
+    Postings are keyed on canonical_url(posting_url or application_url), so
+    re-scraping a posting reached through a different tracking link updates
+    the existing row instead of adding a duplicate.
+    """
+    columns = ", ".join(_JOB_POSTING_COLUMNS)
+    updates = ", ".join(
+        f"{column} = excluded.{column}" for column in _JOB_POSTING_COLUMNS
     )
+    params = [job_data.get(column) for column in _JOB_POSTING_COLUMNS]
+    params.append(canonical_url(posting_url or job_data.get("application_url")))
+    with connection(db_path) as conn:
+        cursor = _cursor(conn, JobPosting)
+        cursor.execute(
+            f"""
+            INSERT INTO Job_Postings ({columns}, canonical_url)
+            VALUES ({", ".join("?" * (len(_JOB_POSTING_COLUMNS) + 1))})
+            ON CONFLICT(canonical_url) DO UPDATE SET {updates}
+            RETURNING {columns}
+            """,
+            params,
+        )
+        return cursor.fetchone()
 
-    conn.commit()
-    conn.close()
 
+def get_job_posting(db_path, job_url):
+    """Returns the JobPosting stored for job_url (matched canonically), or None."""
+    return fetch_one_data(
+        db_path,
+        f"SELECT {', '.join(_JOB_POSTING_COLUMNS)} FROM Job_Postings "
+        "WHERE canonical_url = ?",
+        (canonical_url(job_url),),
+        JobPosting,
+    )
 
-def get_job_postings(db_path, job_url=None, job_title=None):  # -> List:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
 
+def get_job_postings(db_path, job_url=None, job_title=None):  # -> List:
     # SQL query to fetch job posting(s)
-    query = """
-        SELECT 
-            job_title, company_name, location, job_type, 
-            job_description, responsibilities, requirements, 
-            preferred_qualifications, technologies, soft_skills, 
-            salary_range, application_deadline, application_url, 
-            posting_date, job_id, hiring_manager, hiring_address 
-        FROM Job_Postings
-    """
+    query = f"SELECT {', '.join(_JOB_POSTING_COLUMNS)} FROM Job_Postings"
 
     conditions = []
     params = []
 
     if job_url:
-        conditions.append("application_url = ?")
-        params.append(job_url)
+        conditions.append("canonical_url = ?")
+        params.append(canonical_url(job_url))
 
     if job_title:
         conditions.append("job_title = ?")
@@ -650,17 +773,249 @@ def get_job_postings(db_path, job_url=None, job_title=None):  # -> List:
     if conditions:
         query += " WHERE " + " AND ".join(conditions)
 
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
+    return fetch_data(db_path, query, params, JobPosting)
+
+
+# Filters applied by get_resume_snapshot unless the caller overrides a section
+DEFAULT_SNAPSHOT_FILTERS = {
+    "employment_filters": {},
+    "project_filters": {"fields": ["Data Science"], "exclude_fields": ["Personal"]},
+    "personal_project_filters": {"types": ["Personal"]},
+}
+
+
+# Aggregated child columns, embedded as nested JSON arrays in as_lists mode
+_LIST_COLUMNS = {"responsibilities", "details", "covered"}
+
+
+def _snapshot_sections(person_id, filters, as_lists=False):
+    """Returns (key, record, query, params) for every list section of a resume."""
+    return [
+        ("education", EducationRecord, *_education_query(person_id)),
+        (
+            "employment",
+            EmploymentRecord,
+            *_employment_query(person_id, filters["employment_filters"], as_lists),
+        ),
+        ("publications", PublicationRecord, *_publications_query(person_id)),
+        (
+            "projects",
+            ProjectRecord,
+            *_projects_query(
+                person_id, **filters["project_filters"], as_lists=as_lists
+            ),
+        ),
+        (
+            "personal_projects",
+            ProjectRecord,
+            *_projects_query(
+                person_id, **filters["personal_project_filters"], as_lists=as_lists
+            ),
+        ),
+        (
+            "professional_development",
+            ProfessionalDevelopmentRecord,
+            *_professional_development_query(person_id, as_lists),
+        ),
+        ("skills", SkillRecord, *_skills_query(person_id, as_lists)),
+    ]
+
+
+def _section_select(record, query, as_lists):
+    """Wraps a section query in a subquery returning its rows as one JSON array."""
+    row = ", ".join(
+        f"json(s.{column})" if as_lists and column in _LIST_COLUMNS else f"s.{column}"
+        for column in record._fields
+    )
+    return f"(SELECT json_group_array(json_array({row})) FROM ({query}) AS s)"
+
+
+def _load_section(record, rows):
+    return [record._make(values) for values in json.loads(rows)]
+
+
+_PERSON_INFO_SELECT = (
+    "(SELECT json_array(full_name, email, linkedin, github) "
+    "FROM Personal_Info WHERE id = {person})"
+)
+
+
+def _snapshot(person_row, sections, section_rows):
+    if person_row is None:
+        return None
+    full_name, email, linkedin, github = json.loads(person_row)
+    snapshot = {
+        "full_name": full_name,
+        "email": email,
+        "linkedin": linkedin,
+        "github": github,
+    }
+    for (key, record, _, _), rows in zip(sections, section_rows):
+        snapshot[key] = _load_section(record, rows)
+    return snapshot
+
+
+def get_resume_snapshot(path, person_id, filters=None, as_lists=False):
+    """Fetches a person's whole resume profile in a single query.
+
+    Each section's rows are aggregated with json_group_array inside one
+    SELECT, so the profile is read in one round trip from a consistent
+    snapshot. filters may override "employment_filters" (as for
+    get_employment) and "project_filters"/"personal_project_filters"
+    (keyword arguments of get_projects). Returns a dict shaped like
+    resume_builder.fetch_resume_data, with db_records rows, or None if the
+    person doesn't exist.
+    With as_lists, responsibilities/details/covered are lists as returned by
+    the getters' as_lists mode.
+    """
+    filters = {**DEFAULT_SNAPSHOT_FILTERS, **(filters or {})}
+    sections = _snapshot_sections(person_id, filters, as_lists)
+
+    selects = [_PERSON_INFO_SELECT.format(person="?")]
+    params = [person_id]
+    for _, record, query, section_params in sections:
+        selects.append(_section_select(record, query, as_lists))
+        params.extend(section_params)
+
+    try:
+        row = fetch_one_data(path, f"SELECT {', '.join(selects)}", params)
+    except sqlite3.Error as e:
+        print(f"❌ Database error: {e}")
+        return None
+    return _snapshot(row[0], sections, row[1:])
+
+
+# Outer query of the batch getters: one row per requested person, with the
+# ids passed as a single JSON array parameter
+_PEOPLE = _PersonColumn("people.value")
+_PEOPLE_FROM = "FROM json_each(?) AS people"
+
+
+def get_resume_snapshots(path, person_ids, filters=None, as_lists=False):
+    """Fetches the resume profiles of many people in a single query.
+
+    Returns {person_id: snapshot} for every id in person_ids, with
+    snapshots as returned by get_resume_snapshot (None for unknown people).
+    Each section query runs correlated with the list of people, so the cost
+    is one statement however many people are requested.
+    """
+    filters = {**DEFAULT_SNAPSHOT_FILTERS, **(filters or {})}
+    sections = _snapshot_sections(_PEOPLE, filters, as_lists)
+
+    selects = [_PEOPLE, _PERSON_INFO_SELECT.format(person=_PEOPLE)]
+    params = []
+    for _, record, query, section_params in sections:
+        selects.append(_section_select(record, query, as_lists))
+        params.extend(section_params)
+    params.append(json.dumps(list(person_ids)))
 
-    conn.close()
-    return rows
+    try:
+        rows = fetch_data(path, f"SELECT {', '.join(selects)} {_PEOPLE_FROM}", params)
+    except sqlite3.Error as e:
+        print(f"❌ Database error: {e}")
+        return {}
+    return {row[0]: _snapshot(row[1], sections, row[2:]) for row in rows}
+
+
+def get_employment_many(path, person_ids, filters=None, as_lists=False):
+    """Fetches the employment history of many people in a single query.
+
+    Returns {person_id: [EmploymentRecord, ...]} for every id in person_ids,
+    each list as get_employment would return it for that person.
+    """
+    query, params = _employment_query(_PEOPLE, filters, as_lists)
+    select = _section_select(EmploymentRecord, query, as_lists)
+    try:
+        rows = fetch_data(
+            path,
+            f"SELECT {_PEOPLE}, {select} {_PEOPLE_FROM}",
+            [*params, json.dumps(list(person_ids))],
+        )
+    except sqlite3.Error as e:
+        print(f"❌ Database error: {e}")
+        return {}
+    return {
+        person_id: _load_section(EmploymentRecord, jobs) for person_id, jobs in rows
+    }
+
+
+# Full-text searchable sections as (section, fts table, source table, text
+# column, parent table, foreign key to the parent, parent column naming the item)
+_SEARCH_SOURCES = (
+    (
+        "employment",
+        "Responsibilities_fts",
+        "Responsibilities",
+        "description",
+        "Employment",
+        "employment_id",
+        "job_title",
+    ),
+    (
+        "projects",
+        "ProjectDetails_fts",
+        "ProjectDetails",
+        "detail",
+        "Projects",
+        "project_id",
+        "project_name",
+    ),
+    (
+        "skills",
+        "SkillDetails_fts",
+        "SkillDetails",
+        "detail",
+        "Skills",
+        "skill_id",
+        "skill",
+    ),
+    (
+        "professional_development",
+        "PDCovered_fts",
+        "PDCovered",
+        "covered",
+        "ProfessionalDevelopment",
+        "prof_dev_id",
+        "certification_name",
+    ),
+)
+
+
+def search_profile(path, person_id, query, limit=20):
+    """Returns a person's bullets matching query as SearchHits, best match first.
+
+    Responsibilities, project details, skill details and professional
+    development topics are searched through their FTS5 indexes. Any word of
+    query may match (words are stemmed) and hits are ranked by BM25; a lower
+    score is a better match. Each section is scored against its own index.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return []
+    selects = [
+        f"""
+        SELECT '{section}', P.{item}, T.{column}, bm25({fts}) AS score
+        FROM {fts}
+        JOIN {table} T ON T.id = {fts}.rowid
+        JOIN {parent} P ON P.id = T.{foreign_key}
+        WHERE {fts} MATCH ? AND P.person_id = ?
+        """
+        for section, fts, table, column, parent, foreign_key, item in _SEARCH_SOURCES
+    ]
+    params = [expression, person_id] * len(_SEARCH_SOURCES)
+    sql = " UNION ALL ".join(selects) + " ORDER BY score LIMIT ?"
+    try:
+        return fetch_data(path, sql, (*params, limit), SearchHit)
+    except sqlite3.Error as e:
+        print(f"❌ Database error: {e}")
+        return []
 
 
 def get_schema(path):
     """Fetches SQL DB schema"""
     query = """
     SELECT sql FROM sqlite_master WHERE type='table'
+    AND name NOT IN (SELECT name FROM pragma_table_list WHERE type = 'shadow')
     """
     results = fetch_data(path, query=query)
     return results
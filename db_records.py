@@ -0,0 +1,60 @@
+from collections import namedtuple
+
+# Row records returned by the db_manager getters. They are namedtuples, so
+# they compare equal to and unpack like the plain tuples returned before,
+# need no per-row __dict__, and give every column a name.
+PersonInfo = namedtuple("PersonInfo", "full_name email linkedin github")
+
+EducationRecord = namedtuple(
+    "EducationRecord", "degree institution graduation_year graduation_gpa"
+)
+
+EmploymentRecord = namedtuple(
+    "EmploymentRecord",
+    "company location job_title start_date end_date field responsibilities",
+)
+
+PublicationRecord = namedtuple(
+    "PublicationRecord", "title authors publication_date venue edition pages"
+)
+
+CertificationRecord = namedtuple(
+    "CertificationRecord",
+    "certification_name issuing_organization date_obtained expiration_date field",
+)
+
+ProjectRecord = namedtuple(
+    "ProjectRecord",
+    "project_name year technologies project_link field project_type details",
+)
+
+ProfessionalDevelopmentRecord = namedtuple(
+    "ProfessionalDevelopmentRecord",
+    "certification_name issuing_organization date_completed context field covered",
+)
+
+SkillRecord = namedtuple("SkillRecord", "skill details")
+
+JobPosting = namedtuple(
+    "JobPosting",
+    "job_title company_name location job_type job_description responsibilities "
+    "requirements preferred_qualifications technologies soft_skills salary_range "
+    "application_deadline application_url posting_date job_id hiring_manager "
+    "hiring_address",
+)
+
+SearchHit = namedtuple("SearchHit", "section item text score")
+
+BulletHit = namedtuple(
+    "BulletHit", "person_id employment_id responsibility_id text score"
+)
+
+
+def record_factory(record):
+    """Returns a sqlite3 row_factory that builds each row as record."""
+    new = tuple.__new__
+
+    def factory(_cursor, row):
+        return new(record, row)
+
+    return factory
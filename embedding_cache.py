@@ -0,0 +1,224 @@
+import hashlib
+import json
+import threading
+import time
+import numpy as np
+from db_connection import connection
+from posting_url import canonical_url
+from setup_db import FTS_TABLES
+
+# Storage precision of cached vectors; float16 halves the size at a small
+# cost in similarity precision
+DEFAULT_DTYPE = "float32"
+
+# last_used is only rewritten once it is this old, so cache hits rarely write
+TOUCH_INTERVAL_SECONDS = 86400
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def text_hash(text):
+    """Returns the cache key of text (hex sha256 of its UTF-8 bytes)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_embeddings(path, model_name, texts):
+    """Returns {text: vector} for the texts already cached for model_name.
+
+    Vectors are float32 numpy arrays whatever precision they are stored in.
+    Entries last marked used over TOUCH_INTERVAL_SECONDS ago are marked used.
+    """
+    keys = {text_hash(text): text for text in texts}
+    now = int(time.time())
+    # Cache bookkeeping isn't a profile write, so it doesn't notify listeners
+    with connection(path, notify=False) as conn:
+        rows = conn.execute(
+            """
+            SELECT text_hash, dtype, vector, last_used FROM Embeddings
+            WHERE model = ? AND text_hash IN (SELECT value FROM json_each(?))
+            """,
+            (model_name, json.dumps(list(keys))),
+        ).fetchall()
+        stale = [row[0] for row in rows if row[3] < now - TOUCH_INTERVAL_SECONDS]
+        if stale:
+            conn.execute(
+                """
+                UPDATE Embeddings SET last_used = ?
+                WHERE model = ? AND text_hash IN (SELECT value FROM json_each(?))
+                """,
+                (now, model_name, json.dumps(stale)),
+            )
+    return {
+        keys[key]: np.frombuffer(vector, dtype=dtype).astype(np.float32)
+        for key, dtype, vector, _ in rows
+    }
+
+
+def put_embeddings(path, model_name, texts, vectors, dtype=DEFAULT_DTYPE):
+    """Stores one vector per text for model_name, replacing older entries."""
+    now = int(time.time())
+    rows = [
+        (
+            model_name,
+            text_hash(text),
+            dtype,
+            len(vector),
+            np.asarray(vector, dtype=dtype).tobytes(),
+            now,
+        )
+        for text, vector in zip(texts, vectors)
+    ]
+    with connection(path, notify=False) as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO Embeddings
+                (model, text_hash, dtype, dim, vector, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+
+
+def encode_cached(path, model, model_name, texts, dtype=DEFAULT_DTYPE):
+    """Returns a (len(texts), dim) float32 array of embeddings for texts.
+
+    Cached vectors are read in one query; the misses are encoded by model in
+    a single batch and written back.
+    """
+    texts = list(texts)
+    cached = get_embeddings(path, model_name, texts)
+    misses = list(dict.fromkeys(text for text in texts if text not in cached))
+    if misses:
+        vectors = model.encode(misses, convert_to_numpy=True)
+        put_embeddings(path, model_name, misses, vectors, dtype)
+        cached.update(zip(misses, np.asarray(vectors, dtype=np.float32)))
+
+    with _lock:
+        _stats["hits"] += len(texts) - len(misses)
+        _stats["misses"] += len(misses)
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.stack([cached[text] for text in texts])
+
+
+def encode_posting(path, model, model_name, posting_url, text, dtype=DEFAULT_DTYPE):
+    """Returns the float32 embedding of the text of the posting at posting_url.
+
+    The vector is stored with the posting's Job_Postings row (matched
+    canonically) and reused while the text hash still matches, so an edited
+    posting is re-encoded. Postings not in the database are encoded uncached.
+    """
+    key = text_hash(text)
+    with connection(path) as conn:
+        row = conn.execute(
+            """
+            SELECT p.id, e.text_hash, e.dtype, e.vector
+            FROM Job_Postings AS p
+            LEFT JOIN Posting_Embeddings AS e ON e.posting_id = p.id AND e.model = ?
+            WHERE p.canonical_url = ?
+            """,
+            (model_name, canonical_url(posting_url)),
+        ).fetchone()
+
+    hit = row is not None and row[1] == key
+    with _lock:
+        _stats["hits" if hit else "misses"] += 1
+    if hit:
+        return np.frombuffer(row[3], dtype=row[2]).astype(np.float32)
+
+    vector = np.asarray(model.encode([text], convert_to_numpy=True)[0], np.float32)
+    if row is not None:
+        with connection(path, notify=False) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO Posting_Embeddings
+                    (posting_id, model, text_hash, dtype, dim, vector)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    row[0],
+                    model_name,
+                    key,
+                    dtype,
+                    len(vector),
+                    vector.astype(dtype).tobytes(),
+                ),
+            )
+    return vector
+
+
+def cache_stats():
+    """Returns this process's cache hits, misses and hit rate."""
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def reset_cache_stats():
+    with _lock:
+        _stats.update(hits=0, misses=0)
+
+
+def evict(path, max_entries=None, unused_days=None):
+    """Evicts cache entries and returns how many were removed.
+
+    Entries unused for unused_days are dropped, then the least recently used
+    ones beyond max_entries.
+    """
+    removed = 0
+    with connection(path, notify=False) as conn:
+        if unused_days is not None:
+            cutoff = int(time.time() - unused_days * 86400)
+            removed += conn.execute(
+                "DELETE FROM Embeddings WHERE last_used < ?", (cutoff,)
+            ).rowcount
+        if max_entries is not None:
+            removed += conn.execute(
+                """
+                DELETE FROM Embeddings WHERE (model, text_hash) IN (
+                    SELECT model, text_hash FROM Embeddings
+                    ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (max_entries,),
+            ).rowcount
+    return removed
+
+
+def _live_texts(conn):
+    """Returns every bullet text in the database (the texts worth caching)."""
+    texts = set()
+    for _, table, column in FTS_TABLES:
+        texts.update(
+            text
+            for (text,) in conn.execute(
+                f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL"
+            )
+        )
+    return texts
+
+
+def vacuum(path):
+    """Drops entries whose text or job posting no longer exists.
+
+    Returns the number of entries removed.
+    """
+    with connection(path, notify=False) as conn:
+        keep = [text_hash(text) for text in _live_texts(conn)]
+        removed = conn.execute(
+            """
+            DELETE FROM Embeddings
+            WHERE text_hash NOT IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(keep),),
+        ).rowcount
+        removed += conn.execute(
+            """
+            DELETE FROM Posting_Embeddings
+            WHERE posting_id NOT IN (SELECT id FROM Job_Postings)
+            """
+        ).rowcount
+    return removed
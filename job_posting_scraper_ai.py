@@ -1,14 +1,25 @@
-from openai import OpenAI, OpenAIError
-import requests
+import functools
 import json
 import os
-from dotenv import load_dotenv
-from db_manager import add_job_posting, get_job_postings
+from db_manager import add_job_posting, get_job_posting
 
-load_dotenv()
+# requests and openai are imported on first use, so rendering a resume for a
+# posting already in the database never loads them; .env is read on the
+# first call rather than at import
+
+
+@functools.cache
+def _load_env():
+    """Loads API keys from .env (once)."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
 
 
 def scrape_job_data(posting_url):
+    import requests
+
+    _load_env()
     try:
         api_response = requests.post(
             "https://api.zyte.com/v1/extract",
@@ -44,6 +55,9 @@ def scrape_job_data(posting_url):
 
 
 def process_job_text(job_text):
+    from openai import OpenAI, OpenAIError
+
+    _load_env()
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     prompt = f"""
     Here is a job posting:
@@ -131,14 +145,18 @@ def process_job_text(job_text):
 # job_url = "https://www.governmentjobs.com/careers/tacoma/jobs/4779178/customer-service-representative"
 # db_path="resume.db"
 def get_scraped_job_data(db_path, job_url):
-    if not get_job_postings(db_path=db_path, job_url=job_url):
+    _load_env()  # Also makes .env settings visible to the scorer
+    job_data = get_job_posting(db_path=db_path, job_url=job_url)
+    if job_data is None:
         print("Job posting not yet in the database")
         job_text = scrape_job_data(job_url)
         job_json = process_job_text(job_text)
         print(f"\nJOB INFO\n{job_json}")
-        add_job_posting(db_path=db_path, job_data=job_json)
-        job_data = get_job_postings(db_path=db_path, job_url=job_url)[0]
+        # Key the row on the URL we were asked for, so the next lookup hits
+        # even if the model reports a different application_url
+        job_data = add_job_posting(
+            db_path=db_path, job_data=job_json, posting_url=job_url
+        )
     else:
         print("Job posting already in the database")
-        job_data = get_job_postings(db_path=db_path, job_url=job_url)[0]
     return job_data
@@ -1,91 +1,104 @@
-import torch
-from sentence_transformers import SentenceTransformer, util
+import contextlib
+import io
+import numpy as np
 from datetime import datetime
-import re  # For extracting year from job_end_year
+import lexical_prefilter
+from date_parser import parse_month, month_to_year
+from db_records import EmploymentRecord, JobPosting
+from embedding_cache import encode_cached, encode_posting
+from model_registry import DEFAULT_MODEL, embedding_key, get_model
 
 
 def extract_year(date_str):
-    """Extracts the year from a date string (e.g., 'Aug. 2020', '2005', 'current')."""
-    if not date_str or date_str.lower() in {"current", "present", "now", "ongoing"}:
-        return datetime.now().year  # Return current year
+    """Extracts the year from a date string (e.g., 'Aug. 2020', '2005', 'current').
 
-    match = re.search(r"(19\d{2}|20\d{2})", date_str)  # Look for a 4-digit year
-    return int(match.group(0)) if match else None  # Convert to int if found
+    Integer YYYYMM values are accepted too. Employment records only carry
+    the end_date text, so that is what positions are scored on. Parsing is
+    cached, so repeated positions aren't re-parsed.
+    """
+    if not date_str:
+        return datetime.now().year  # Return current year
+    return month_to_year(parse_month(date_str))
 
 
-def score_and_rank_relevance(
-    job_disc_data=None,
-    past_employment=None,
-    top_N=5,
-    recency_weight=0.3,
-    relevance_threshold=0.3,
-    max_years_old=10,
-):
-    # Use GPU if available
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = SentenceTransformer("all-MiniLM-L6-v2", device=device)
-
-    # Unpack job_data
-    (
-        job_title,
-        company_name,
-        loc,
-        job_type,
-        job_description,
-        duties,
-        requirements,
-        preferred_qualifications,
-        technologies,
-        soft_skills,
-        salary_range,
-        application_deadline,
-        application_url,
-        posting_date,
-        job_id,
-        hiring_manager,
-        hiring_address,
-    ) = job_disc_data
-
-    # Job posting text
-    job_posting = f"""
-        {job_title}\n{job_description}\n{duties}\n{requirements}\n{preferred_qualifications}\n{technologies}\n{soft_skills}
+def _posting_text(job):
+    """Returns the posting text that responsibilities are compared against."""
+    return f"""
+        {job.job_title}\n{job.job_description}\n{job.responsibilities}\n{job.requirements}\n{job.preferred_qualifications}\n{job.technologies}\n{job.soft_skills}
         """
 
-    # Encode job posting once
+
+def _encode_posting(model, job, db_path=None, posting_url=None):
+    """Encodes the posting, reusing the embedding stored with its row if given db_path."""
     print(
-        f"Encoding data for job posting:\n{company_name} in {loc}, {job_type} with salary: {salary_range}"
+        f"Encoding data for job posting:\n{job.company_name} in {job.location}, {job.job_type} with salary: {job.salary_range}"
     )
     print(
         f"""
-        Job ID: {job_id} Posted {posting_date}, Application deadline: {application_deadline}\nPosting URL: {application_url}
-        Hiring manager: {hiring_manager}, Hiring address: {hiring_address}
+        Job ID: {job.job_id} Posted {job.posting_date}, Application deadline: {job.application_deadline}\nPosting URL: {job.application_url}
+        Hiring manager: {job.hiring_manager}, Hiring address: {job.hiring_address}
         """
     )
-    job_embedding = model.encode(job_posting, convert_to_tensor=True)
+    if db_path:
+        return encode_posting(
+            db_path,
+            model,
+            embedding_key(DEFAULT_MODEL),
+            posting_url or job.application_url,
+            _posting_text(job),
+        )
+    return model.encode(_posting_text(job), convert_to_numpy=True)
 
-    # Process each past job independently
-    # print(past_jobs.items())
-    (company, location, title, start_date, end_date, field, responsibilities) = (
-        past_employment
-    )
-    print(f"{title} at {company}, {location}, {field}, {start_date} - {end_date}.")
-    responsibilities = responsibilities.split(";")
 
+def _responsibility_list(position):
+    responsibilities = position.responsibilities
+    if isinstance(responsibilities, str):
+        # Legacy ';'-joined form from the getters without as_lists
+        responsibilities = responsibilities.split(";")
+    return responsibilities
+
+
+def _encode_bullets(model, texts, db_path):
+    """Encodes texts in one batch, reusing cached embeddings when db_path is given."""
+    if db_path:
+        return encode_cached(db_path, model, embedding_key(DEFAULT_MODEL), texts)
+    return model.encode(texts, convert_to_numpy=True)
+
+
+def _cosine_similarities(query, vectors):
+    """Returns the cosine similarity of query to each row of vectors."""
+    query = np.asarray(query, dtype=np.float32)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+    return vectors @ query / np.maximum(norms, 1e-8)
+
+
+def _select_responsibilities(
+    position,
+    responsibilities,
+    similarities,
+    top_N,
+    recency_weight,
+    relevance_threshold,
+    max_years_old,
+):
+    """Applies the relevance and recency rules to one position's similarities.
+
+    Returns its top_N most relevant responsibilities, or None if the position
+    should be left off the resume.
+    """
+    print(
+        f"{position.job_title} at {position.company}, {position.location}, {position.field}, {position.start_date} - {position.end_date}."
+    )
     # Extract year from the string
-    job_end_year = extract_year(end_date)
+    job_end_year = extract_year(position.end_date)
 
     # Calculate years since job ended
     years_since_job = datetime.now().year - job_end_year
 
-    # Encode all responsibilities for this job at once
-    exp_embeddings = model.encode(responsibilities, convert_to_tensor=True)
-
-    # Compute similarity scores
-    similarities = util.pytorch_cos_sim(job_embedding, exp_embeddings).squeeze(0)
-
     # Calculate job-level metrics
-    avg_relevance = similarities.mean().item()
-    max_relevance = similarities.max().item()
+    avg_relevance = float(similarities.mean())
+    max_relevance = float(similarities.max())
 
     # Compute job recency score
     recency_score = max(
@@ -106,19 +119,185 @@ def score_and_rank_relevance(
 
     # The positions that survive past this point are either recent enough or relevant enough to be included.
     # Select the top N most relevant responsibilities
-    sorted_indices = torch.argsort(similarities, descending=True)[:top_N]
+    sorted_indices = np.argsort(-similarities, kind="stable")[:top_N]
     top_responsibilities = [
         responsibilities[idx]
         for idx in sorted_indices
-        if similarities[idx].item() > relevance_threshold - 0.1
+        if similarities[idx] > relevance_threshold - 0.1
     ]
     # print(top_responsibilities)
     for idx in sorted_indices:
-        print(f"Score: {similarities[idx].item():.3f} for {responsibilities[idx]}")
+        print(f"Score: {similarities[idx]:.3f} for {responsibilities[idx]}")
 
     return top_responsibilities
 
 
+def score_and_rank_relevance(
+    job_disc_data=None,
+    past_employment=None,
+    top_N=5,
+    recency_weight=0.3,
+    relevance_threshold=0.3,
+    max_years_old=10,
+    db_path=None,
+    posting_url=None,
+):
+    # Loaded once per process (on the GPU if available) and reused
+    model = get_model(DEFAULT_MODEL)
+
+    # Accept db_records rows or plain tuples in the same column order
+    job = JobPosting._make(job_disc_data)
+    job_embedding = _encode_posting(model, job, db_path, posting_url)
+
+    position = EmploymentRecord._make(past_employment)
+    responsibilities = _responsibility_list(position)
+
+    # Encode all responsibilities for this job at once, reusing the embeddings
+    # cached in the database when db_path is given
+    exp_embeddings = _encode_bullets(model, responsibilities, db_path)
+
+    # Compute similarity scores
+    similarities = _cosine_similarities(job_embedding, exp_embeddings)
+    return _select_responsibilities(
+        position,
+        responsibilities,
+        similarities,
+        top_N,
+        recency_weight,
+        relevance_threshold,
+        max_years_old,
+    )
+
+
+def _position_similarities(model, job_embedding, bullets, db_path):
+    """Returns each position's bullet similarities to the posting.
+
+    All bullets are encoded in one batch and scored in one operation.
+    """
+    texts = [text for position_bullets in bullets for text in position_bullets]
+    if not texts:
+        return [np.empty(0, dtype=np.float32) for _ in bullets]
+    similarities = _cosine_similarities(
+        job_embedding, _encode_bullets(model, texts, db_path)
+    )
+    return np.split(similarities, np.cumsum([len(b) for b in bullets])[:-1])
+
+
+def score_resume(
+    job_disc_data,
+    positions,
+    top_N=5,
+    recency_weight=0.3,
+    relevance_threshold=0.3,
+    max_years_old=10,
+    db_path=None,
+    posting_url=None,
+    prefilter_top_m=None,
+):
+    """Scores every position of a resume against a job posting in one pass.
+
+    Equivalent to calling score_and_rank_relevance per position, but the
+    posting is encoded once, all positions' responsibilities are encoded in
+    a single batch and their similarities come from one matrix operation.
+    Returns one entry per position: its selected responsibilities, or None
+    if the position should be left off (positions without any are None).
+    With db_path, the embeddings stored in the database are reused.
+
+    With prefilter_top_m (default: RESUME_PREFILTER_TOP_M, 0 for off), only
+    each position's prefilter_top_m best BM25 matches for the posting are
+    embedded and scored. The relevance rules, including the average
+    relevance that decides whether a position is dropped, then see only
+    those bullets, so positions may be kept or dropped differently than
+    without the prefilter. prefilter_recall reports both effects.
+    """
+    model = get_model(DEFAULT_MODEL)
+    job = JobPosting._make(job_disc_data)
+    job_embedding = _encode_posting(model, job, db_path, posting_url)
+
+    positions = [EmploymentRecord._make(position) for position in positions]
+    bullets = [_responsibility_list(position) or [] for position in positions]
+    if prefilter_top_m is None:
+        prefilter_top_m = lexical_prefilter.prefilter_top_m()
+    if prefilter_top_m:
+        kept = lexical_prefilter.prefilter(_posting_text(job), bullets, prefilter_top_m)
+        bullets = [[group[i] for i in idx] for group, idx in zip(bullets, kept)]
+
+    return [
+        (
+            _select_responsibilities(
+                position,
+                position_bullets,
+                similarities,
+                top_N,
+                recency_weight,
+                relevance_threshold,
+                max_years_old,
+            )
+            if position_bullets
+            else None
+        )
+        for position, position_bullets, similarities in zip(
+            positions,
+            bullets,
+            _position_similarities(model, job_embedding, bullets, db_path),
+        )
+    ]
+
+
+def prefilter_recall(
+    job_disc_data,
+    positions,
+    prefilter_top_m,
+    top_N=5,
+    recency_weight=0.3,
+    relevance_threshold=0.3,
+    max_years_old=10,
+    db_path=None,
+    posting_url=None,
+):
+    """Measures what the BM25 prefilter misses for one posting and resume.
+
+    Every bullet is embedded and score_resume's selections are made both
+    from all bullets and from the prefiltered ones. Returns a dict with:
+    recall, the share of full-embedding selections the prefiltered run also
+    selects; positions_dropped and positions_added, the positions only the
+    full or only the prefiltered run keeps; bullets, the number of bullets;
+    and embedded, the number the prefilter would embed.
+    """
+    model = get_model(DEFAULT_MODEL)
+    job = JobPosting._make(job_disc_data)
+    job_embedding = _encode_posting(model, job, db_path, posting_url)
+
+    positions = [EmploymentRecord._make(position) for position in positions]
+    bullets = [_responsibility_list(position) or [] for position in positions]
+    kept = lexical_prefilter.prefilter(_posting_text(job), bullets, prefilter_top_m)
+    similarities = _position_similarities(model, job_embedding, bullets, db_path)
+
+    selected = found = dropped = added = 0
+    settings = (top_N, recency_weight, relevance_threshold, max_years_old)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for position, group, idx, sims in zip(positions, bullets, kept, similarities):
+            if not group:
+                continue
+            full = _select_responsibilities(position, group, sims, *settings)
+            filtered = _select_responsibilities(
+                position, [group[i] for i in idx], sims[idx], *settings
+            )
+            dropped += full is not None and filtered is None
+            added += full is None and filtered is not None
+            if full is not None:
+                selected += len(full)
+                found += len(set(full) & set(filtered or []))
+
+    return {
+        "recall": found / selected if selected else 1.0,
+        "positions_dropped": dropped,
+        "positions_added": added,
+        "bullets": sum(len(group) for group in bullets),
+        "embedded": sum(len(idx) for idx in kept),
+    }
+
+
 # # job_url = "https://www.governmentjobs.com/careers/tacoma/jobs/4779178/customer-service-representative"
 # job_url = "https://jobs.jobvite.com/mariners/job/oU1uvfwE"
 # # job_url = "https://www.usajobs.gov/job/832162900"
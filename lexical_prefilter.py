@@ -0,0 +1,59 @@
+import os
+import sqlite3
+from setup_db import FTS_TOKENIZER, match_expression
+
+# Number of bullets per position kept for embedding scoring by default; unset
+# (or 0) turns the prefilter off
+PREFILTER_ENV_VAR = "RESUME_PREFILTER_TOP_M"
+
+
+def prefilter_top_m():
+    """Returns the configured top-M per position, or None if the stage is off."""
+    return int(os.environ.get(PREFILTER_ENV_VAR) or 0) or None
+
+
+def bm25_scores(query, texts):
+    """Returns the BM25 score of each text for query; lower is better.
+
+    texts are indexed as one corpus in an in-memory FTS5 table with the same
+    stemming as the database's full-text indexes. Texts sharing no word with
+    query score 0.
+    """
+    scores = [0.0] * len(texts)
+    expression = match_expression(query)
+    if not expression or not texts:
+        return scores
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute(
+            f"CREATE VIRTUAL TABLE bullets USING fts5(text, tokenize='{FTS_TOKENIZER}')"
+        )
+        conn.executemany(
+            "INSERT INTO bullets (rowid, text) VALUES (?, ?)", enumerate(texts)
+        )
+        for rowid, score in conn.execute(
+            "SELECT rowid, bm25(bullets) FROM bullets WHERE bullets MATCH ?",
+            (expression,),
+        ):
+            scores[rowid] = score
+    finally:
+        conn.close()
+    return scores
+
+
+def prefilter(query, groups, top_m):
+    """Keeps the top_m bullets of each group that best match query lexically.
+
+    groups holds one list of bullets per position; all of them are scored
+    as one corpus (a person's bullets). Returns each group's kept indexes in
+    their original order.
+    """
+    scores = bm25_scores(query, [text for group in groups for text in group])
+    kept = []
+    start = 0
+    for group in groups:
+        group_scores = scores[start : start + len(group)]
+        best = sorted(range(len(group)), key=group_scores.__getitem__)[:top_m]
+        kept.append(sorted(best))
+        start += len(group)
+    return kept
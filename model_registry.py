@@ -0,0 +1,184 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; memory is then not reported
+    resource = None
+
+# Sentence embedding model used to score resume content against job postings
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+# Directory holding downloaded models (one sub-directory per model name), so
+# machines without network access can load them from disk
+MODEL_DIR_ENV_VAR = "RESUME_MODEL_DIR"
+
+# Encoder backend used to load models, unless set_backend picks another
+BACKEND_ENV_VAR = "RESUME_ENCODER_BACKEND"
+DEFAULT_BACKEND = "torch"
+
+ModelStats = namedtuple(
+    "ModelStats",
+    "name source device load_seconds parameter_bytes peak_rss_bytes backend",
+)
+
+_models = {}
+_stats = {}
+_paths = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def _load_torch(source, device):
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(source, device=device)
+
+
+def _load_onnx(source, device):
+    from onnx_encoder import load_onnx
+
+    return load_onnx(source, device)
+
+
+# Backends as name -> loader(source, device). A loader returns a model with
+# SentenceTransformer's encode(texts, convert_to_numpy=..., convert_to_tensor=...)
+_backends = {"torch": _load_torch, "onnx": _load_onnx}
+# Backend name plus precision, which embedding_key adds to stored embeddings
+_backend_tags = {"torch": "torch-fp32", "onnx": "onnx-int8"}
+# The backend chosen with set_backend (None defers to the environment)
+_backend_state = {"active": None}
+
+
+def register_backend(name, loader, tag=None):
+    """Adds an encoder backend; loader(source, device) returns the model.
+
+    tag (default: name) identifies the backend's vectors in embedding_key,
+    so it should change whenever the vectors it produces would.
+    """
+    _backends[name] = loader
+    _backend_tags[name] = tag or name
+
+
+def embedding_key(name=DEFAULT_MODEL):
+    """Returns the key embeddings of model name are stored under.
+
+    It includes the backend and precision (e.g. 'all-MiniLM-L6-v2@onnx-int8'),
+    so vectors from different encoders are never compared with each other.
+    """
+    return f"{name}@{_backend_tags[encoder_backend()]}"
+
+
+def encoder_backend():
+    """Returns the name of the backend models are loaded with."""
+    return _backend_state["active"] or os.environ.get(BACKEND_ENV_VAR) or DEFAULT_BACKEND
+
+
+def set_backend(name):
+    """Loads models with the named backend from now on (None for the default).
+
+    Models already loaded with another backend are unloaded.
+    """
+    if name is not None and name not in _backends:
+        raise ValueError(f"Unknown encoder backend: {name!r}")
+    _backend_state["active"] = name
+    unload()
+
+
+def register_model_path(name, path):
+    """Loads the model called name from a local path instead of the hub."""
+    _paths[name] = path
+
+
+def model_source(name):
+    """Returns where name will be loaded from: a local path if known, else name."""
+    if name in _paths:
+        return _paths[name]
+    model_dir = os.environ.get(MODEL_DIR_ENV_VAR)
+    if model_dir and os.path.isdir(os.path.join(model_dir, name)):
+        return os.path.join(model_dir, name)
+    return name
+
+
+def _default_device():
+    if encoder_backend() != "torch":
+        return "cpu"
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_model(name=DEFAULT_MODEL, device=None):
+    """Returns the process-wide SentenceTransformer for name, loading it once.
+
+    Loading is lazy and thread-safe: concurrent first calls wait for a single
+    load. device (CUDA when available by default) only applies to that load.
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        model = _models.get(name)
+        if model is None:
+            model = _models[name] = _load(name, device or _default_device())
+    return model
+
+
+def _parameter_bytes(model):
+    if hasattr(model, "parameters"):
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    return getattr(model, "parameter_bytes", 0)
+
+
+def _load(name, device):
+    backend = encoder_backend()
+    source = model_source(name)
+    rss_before = _peak_rss_bytes()
+    start = time.perf_counter()
+    model = _backends[backend](source, device)
+    _stats[name] = ModelStats(
+        name,
+        source,
+        device,
+        time.perf_counter() - start,
+        _parameter_bytes(model),
+        _peak_rss_bytes() - rss_before,
+        backend,
+    )
+    print(
+        f"Loaded {name} from {source} on {device} with {backend} "
+        f"in {_stats[name].load_seconds:.2f}s"
+    )
+    return model
+
+
+def warm_up(names=(DEFAULT_MODEL,), device=None):
+    """Loads each model and runs one encode, so the first request isn't slow."""
+    for name in names:
+        get_model(name, device).encode(["warm up"])
+    return model_stats()
+
+
+def model_stats():
+    """Returns a ModelStats (load time and memory) per loaded model."""
+    return dict(_stats)
+
+
+def unload(name=None):
+    """Drops a loaded model (or all of them) so the next call reloads it."""
+    with _registry_lock:
+        for key in list(_models) if name is None else [name]:
+            _models.pop(key, None)
+            _stats.pop(key, None)
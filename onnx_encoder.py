@@ -0,0 +1,171 @@
+import json
+import os
+import numpy as np
+
+# Files export_onnx writes into a model directory
+ONNX_FILE = "model.onnx"
+QUANTIZED_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "encoder.json"
+
+# Where load_onnx exports models that have no ONNX directory yet
+ONNX_DIR_ENV_VAR = "RESUME_ONNX_DIR"
+DEFAULT_ONNX_DIR = os.path.join("~", ".cache", "resume_populater", "onnx")
+
+
+def export_onnx(source, output_dir, quantize=True):
+    """Exports a SentenceTransformer model for OnnxEncoder and returns output_dir.
+
+    source is a model name or path. The transformer is written as ONNX_FILE
+    and, with quantize, as a dynamically quantized int8 copy (QUANTIZED_FILE)
+    whose weights are a quarter of the size. Exporting needs torch,
+    sentence_transformers and onnxruntime; OnnxEncoder itself needs neither
+    of the first two.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(source, device="cpu")
+    pooling = model[1].get_pooling_mode_str()
+    if pooling != "mean":
+        raise ValueError(f"Only mean pooling is supported, {source} uses {pooling}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = model.tokenizer
+    tokenizer.save_pretrained(output_dir)
+    sample = tokenizer(["Export this model"], return_tensors="pt")
+    # In the order of the transformer's forward() arguments
+    names = [
+        name
+        for name in ("input_ids", "attention_mask", "token_type_ids")
+        if name in sample
+    ]
+    axes = {0: "batch", 1: "tokens"}
+    path = os.path.join(output_dir, ONNX_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model[0].auto_model.eval(),
+            tuple(sample[name] for name in names),
+            path,
+            input_names=names,
+            output_names=["token_embeddings"],
+            dynamic_axes={name: axes for name in names + ["token_embeddings"]},
+            opset_version=14,
+        )
+    if quantize:
+        quantize_dynamic(
+            path, os.path.join(output_dir, QUANTIZED_FILE), weight_type=QuantType.QInt8
+        )
+
+    config = {
+        "source": source,
+        "max_seq_length": model.max_seq_length,
+        "pad_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        "dim": model.get_sentence_embedding_dimension(),
+    }
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    return output_dir
+
+
+def load_onnx(source, device="cpu", quantized=True):
+    """Returns an OnnxEncoder for source, exporting it on first use.
+
+    source is an export_onnx directory, or a model name or path whose export
+    is kept under RESUME_ONNX_DIR. Only the CPU device is supported.
+    """
+    if device != "cpu":
+        raise ValueError(f"The ONNX backend runs on the CPU, not {device}")
+    if not os.path.isfile(os.path.join(source, CONFIG_FILE)):
+        onnx_dir = os.path.expanduser(
+            os.environ.get(ONNX_DIR_ENV_VAR) or DEFAULT_ONNX_DIR
+        )
+        model_dir = os.path.join(onnx_dir, os.path.basename(os.path.normpath(source)))
+        if not os.path.isfile(os.path.join(model_dir, CONFIG_FILE)):
+            export_onnx(source, model_dir)
+        source = model_dir
+    return OnnxEncoder(source, quantized)
+
+
+class OnnxEncoder:
+    """Runs an export_onnx model on ONNX Runtime with SentenceTransformer's encode."""
+
+    device = "cpu"
+
+    def __init__(self, model_dir, quantized=True, batch_size=32, threads=None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), encoding="utf-8") as f:
+            self.config = json.load(f)
+        path = os.path.join(model_dir, QUANTIZED_FILE if quantized else ONNX_FILE)
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(self.config["max_seq_length"])
+        self.tokenizer.enable_padding(
+            pad_id=self.config["pad_id"], pad_token=self.config["pad_token"]
+        )
+        self.batch_size = batch_size
+        self.parameter_bytes = os.path.getsize(path)
+
+    def encode(
+        self,
+        sentences,
+        batch_size=None,
+        convert_to_numpy=True,
+        convert_to_tensor=False,
+        **kwargs,
+    ):
+        """Returns float32 embeddings of sentences (a torch tensor on request).
+
+        convert_to_numpy and other SentenceTransformer.encode options are
+        accepted so callers can pass them, but have no effect.
+        """
+        del convert_to_numpy, kwargs
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        batch_size = batch_size or self.batch_size
+
+        # Batch texts of similar length together to keep padding short
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        vectors = np.empty((len(texts), self.config["dim"]), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = order[start : start + batch_size]
+            vectors[batch] = self._encode_batch([texts[i] for i in batch])
+
+        if convert_to_tensor:
+            import torch
+
+            vectors = torch.from_numpy(vectors)
+        return vectors[0] if single else vectors
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array(
+                [e.attention_mask for e in encodings], dtype=np.int64
+            ),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        (tokens,) = self.session.run(
+            ["token_embeddings"],
+            {name: value for name, value in inputs.items() if name in self.input_names},
+        )
+        # Mean pooling over the real (unpadded) tokens, as SentenceTransformer does
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        pooled = (tokens * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config["normalize"]:
+            pooled /= np.clip(
+                np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None
+            )
+        return pooled
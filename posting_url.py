@@ -0,0 +1,57 @@
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that describe how a posting was found rather than which
+# posting it is (search terms, location filters, campaign tracking)
+IGNORED_PARAMS = {
+    "q",
+    "query",
+    "keywords",
+    "locations",
+    "location",
+    "source",
+    "src",
+    "ref",
+    "refid",
+    "referrer",
+    "trk",
+    "trackingid",
+    "gh_src",
+    "lever-source",
+    "lever-origin",
+    "fbclid",
+    "gclid",
+    "mc_cid",
+    "mc_eid",
+}
+
+
+@lru_cache(maxsize=1024)
+def canonical_url(url):
+    """Returns the key used to deduplicate job postings scraped from url.
+
+    The scheme and host are lowercased (dropping 'www.' and default ports),
+    trailing slashes are removed from the path, utm_* and IGNORED_PARAMS are
+    dropped and the remaining query parameters are sorted. Fragments are
+    kept because some applicant tracking systems route postings through them.
+    """
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    if scheme == "http":
+        scheme = "https"
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/")
+    params = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in IGNORED_PARAMS and not key.lower().startswith("utm_")
+    )
+    return urlunsplit((scheme, host, path, urlencode(params), parts.fragment))
@@ -0,0 +1,83 @@
+import json
+import threading
+from collections import OrderedDict
+from db_connection import add_write_listener, data_changed, database_key
+from db_manager import get_resume_snapshot
+
+# Maximum number of profile snapshots kept in memory
+CACHE_SIZE = 128
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+# Bumped on every invalidation so a read racing a write isn't cached
+_generations = {}
+
+
+def _filters_key(filters):
+    """Returns a hashable, order-independent form of a filters dict."""
+    return json.dumps(filters or {}, sort_keys=True, default=str)
+
+
+def _drop(db_key):
+    """Drops cached snapshots whose database key matches (None matches all)."""
+    with _lock:
+        _generations[db_key] = _generations.get(db_key, 0) + 1
+        stale = [k for k in _cache if db_key is None or k[0] == db_key]
+        for k in stale:
+            del _cache[k]
+        if stale:
+            _stats["invalidations"] += 1
+
+
+def invalidate(path=None):
+    """Drops cached snapshots for one database (or all databases)."""
+    _drop(None if path is None else database_key(path))
+
+
+add_write_listener(_drop)
+
+
+def get_cached_snapshot(path, person_id, filters=None, as_lists=False):
+    """Returns get_resume_snapshot(path, person_id, filters, as_lists) through an LRU cache.
+
+    Writes made through db_manager drop the database's entries as soon as
+    they commit, and PRAGMA data_version catches writes from other
+    connections and processes. The returned dict is shared between callers
+    and must be treated as read-only.
+    """
+    db_key = database_key(path)
+    if data_changed(path):
+        _drop(db_key)
+
+    key = (db_key, person_id, _filters_key(filters), as_lists)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return _cache[key]
+        _stats["misses"] += 1
+        generation = (_generations.get(db_key), _generations.get(None))
+
+    snapshot = get_resume_snapshot(path, person_id, filters, as_lists)
+    if snapshot is None:
+        return None
+    with _lock:
+        if generation == (_generations.get(db_key), _generations.get(None)):
+            _cache[key] = snapshot
+            _cache.move_to_end(key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return snapshot
+
+
+def cache_stats():
+    """Returns hit/miss/invalidation counters and the current cache size."""
+    with _lock:
+        return {**_stats, "size": len(_cache)}
+
+
+def reset_cache_stats():
+    with _lock:
+        for name in _stats:
+            _stats[name] = 0
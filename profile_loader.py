@@ -0,0 +1,233 @@
+import csv
+import json
+import os
+from date_parser import parse_month
+from db_connection import connection
+from posting_url import canonical_url
+from setup_db import FTS_TABLES, SORT_DATE_COLUMNS, fts_statements, migrate
+
+# Seed sections as (section, table, parent section, foreign key). Parents are
+# listed before their children, which is also the order rows are written in.
+SECTIONS = [
+    ("personal_info", "Personal_Info", None, None),
+    ("education", "Education", "personal_info", "person_id"),
+    ("coursework", "Coursework", "education", "education_id"),
+    ("employment", "Employment", "personal_info", "person_id"),
+    ("responsibilities", "Responsibilities", "employment", "employment_id"),
+    ("projects", "Projects", "personal_info", "person_id"),
+    ("project_details", "ProjectDetails", "projects", "project_id"),
+    ("skills", "Skills", "personal_info", "person_id"),
+    ("skill_details", "SkillDetails", "skills", "skill_id"),
+    ("certifications", "Certifications", "personal_info", "person_id"),
+    ("publications", "Publications", "personal_info", "person_id"),
+    (
+        "professional_development",
+        "ProfessionalDevelopment",
+        "personal_info",
+        "person_id",
+    ),
+    ("covered", "PDCovered", "professional_development", "prof_dev_id"),
+    ("job_postings", "Job_Postings", None, None),
+]
+
+# Child lists in a nested JSON profile as (parent section, key, child section,
+# column a bare string item fills)
+NESTED = [
+    ("education", "coursework", "coursework", "course_name"),
+    ("employment", "responsibilities", "responsibilities", "description"),
+    ("projects", "details", "project_details", "detail"),
+    ("skills", "details", "skill_details", "detail"),
+    ("professional_development", "covered", "covered", "covered"),
+]
+
+# Rows buffered per table before they are written
+BATCH_SIZE = 5000
+
+# Columns computed from another column rather than read from the seed file
+_DERIVED = {"Job_Postings": [("canonical_url", "application_url", canonical_url)]}
+for _table, _column, _source in SORT_DATE_COLUMNS:
+    _DERIVED.setdefault(_table, []).append((_column, _source, parse_month))
+
+
+def _profile_events(profile):
+    """Flattens one nested profile document into (section, record) events."""
+    profile = dict(profile)
+    if "personal_info" in profile:
+        yield "personal_info", profile.pop("personal_info")
+    for section, record in profile.items():
+        yield from _section_events(section, record)
+
+
+def _section_events(section, records):
+    children = {
+        key: (child, column)
+        for parent, key, child, column in NESTED
+        if parent == section
+    }
+    for record in records if isinstance(records, list) else [records]:
+        record = dict(record)
+        nested = {key: record.pop(key) for key in children if key in record}
+        yield section, record
+        for key, items in nested.items():
+            child, column = children[key]
+            for item in items or []:
+                yield child, {column: item} if isinstance(item, str) else item
+
+
+def _json_events(f):
+    document = json.load(f)
+    for profile in document if isinstance(document, list) else [document]:
+        yield from _profile_events(profile)
+
+
+def _jsonl_events(f):
+    for line in f:
+        if line.strip():
+            record = json.loads(line)
+            yield record.pop("section"), record
+
+
+def _csv_events(f):
+    for row in csv.DictReader(f):
+        section = row.pop("section")
+        yield section, {key: value for key, value in row.items() if value != ""}
+
+
+_READERS = {".json": _json_events, ".jsonl": _jsonl_events, ".csv": _csv_events}
+
+
+def load_profile(path, seed_file):
+    """Imports a profile seed file into the database at path in one transaction.
+
+    A .json file holds one nested profile document (or a list of them):
+    personal_info plus lists of education (with coursework), employment (with
+    responsibilities), projects (with details), skills (with details),
+    certifications, publications, professional_development (with covered)
+    and job_postings. Keys match the table columns; child items may be plain
+    strings. In .jsonl and .csv files each line/row is one record with a
+    'section' key naming its SECTIONS entry; child records belong to the
+    latest record of their parent section.
+
+    Ids are allocated in memory so rows are streamed in batches without
+    reading anything back. Returns the number of rows added per section.
+    """
+    reader = _READERS.get(os.path.splitext(seed_file)[1].lower())
+    if reader is None:
+        raise ValueError(f"Unsupported seed file type: {seed_file}")
+
+    migrate(path)
+    with connection(path) as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")  # Hold the write lock for our ids
+        loader = _Loader(conn)
+        # Index the new text in one pass at the end instead of row by row
+        for fts, _, _ in FTS_TABLES:
+            conn.execute(f"DROP TRIGGER IF EXISTS {fts}_ai")
+        with open(seed_file, newline="", encoding="utf-8") as f:
+            for section, record in reader(f):
+                loader.add(section, record)
+        loader.flush()
+        loader.index_text()
+        for statement in fts_statements():
+            conn.execute(statement)
+
+    print(f"✅ Loaded {sum(loader.counts.values())} rows from {seed_file}")
+    return loader.counts
+
+
+class _Loader:
+    """Buffers seed records per table, assigning ids and parent keys as it goes."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.sections = {}
+        for section, table, parent, foreign_key in SECTIONS:
+            columns = [
+                row[1]
+                for row in conn.execute(f"PRAGMA table_info({table})")
+                if row[1] not in ("id", foreign_key)
+            ]
+            (last_id,) = conn.execute(
+                f"SELECT COALESCE(MAX(id), 0) FROM {table}"
+            ).fetchone()
+            self.sections[section] = _Section(
+                table, parent, foreign_key, columns, last_id, _DERIVED.get(table, [])
+            )
+        self.first_ids = {
+            target.table: target.last_id for target in self.sections.values()
+        }
+        self.counts = dict.fromkeys(self.sections, 0)
+        self.buffered = 0
+
+    def add(self, section, record):
+        target = self.sections.get(section)
+        if target is None:
+            raise ValueError(f"Unknown seed section: {section!r}")
+        if not target.fields.issuperset(record):
+            unknown = sorted(set(record) - target.fields)
+            raise ValueError(f"Unknown {section} fields: {unknown}")
+
+        target.last_id += 1
+        row = [target.last_id]
+        if target.parent:
+            parent_id = self.sections[target.parent].current_id
+            if parent_id is None:
+                raise ValueError(f"{section} record before any {target.parent}")
+            row.append(parent_id)
+        row += map(record.get, target.columns)
+        if target.derived:
+            row += [derive(record.get(source)) for _, source, derive in target.derived]
+        target.current_id = target.last_id
+        target.rows.append(row)
+        self.counts[section] += 1
+
+        self.buffered += 1
+        if self.buffered >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        for target in self.sections.values():
+            if target.rows:
+                self.conn.executemany(target.insert, target.rows)
+                target.rows = []
+        self.buffered = 0
+
+    def index_text(self):
+        """Adds the loaded rows of each full-text indexed table to its index."""
+        for fts, table, column in FTS_TABLES:
+            self.conn.execute(
+                f"INSERT INTO {fts} (rowid, {column}) "
+                f"SELECT id, {column} FROM {table} WHERE id > ?",
+                (self.first_ids[table],),
+            )
+
+
+class _Section:
+    __slots__ = (
+        "table",
+        "parent",
+        "columns",
+        "derived",
+        "fields",
+        "insert",
+        "last_id",
+        "current_id",
+        "rows",
+    )
+
+    def __init__(self, table, parent, foreign_key, columns, last_id, derived):
+        derived_columns = {column for column, _, _ in derived}
+        self.table = table
+        self.parent = parent
+        self.columns = [column for column in columns if column not in derived_columns]
+        self.derived = derived
+        self.fields = set(self.columns)
+        names = ["id", *([foreign_key] if parent else []), *self.columns]
+        names += [column for column, _, _ in derived]
+        self.insert = (
+            f"INSERT INTO {table} ({', '.join(names)}) "
+            f"VALUES ({', '.join('?' * len(names))})"
+        )
+        self.last_id = last_id
+        self.current_id = None
+        self.rows = []
@@ -0,0 +1,205 @@
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+# Queries slower than this (execute plus fetch) are logged with their plan
+SLOW_QUERY_MS = 50.0
+
+# Set to a file path to turn instrumentation on at import and dump it at exit
+DUMP_ENV_VAR = "RESUME_DB_QUERY_LOG"
+
+QueryStat = namedtuple("QueryStat", "fingerprint calls rows total_ms mean_ms max_ms")
+
+_state = {"enabled": False, "slow_ms": SLOW_QUERY_MS, "dump_path": None}
+_lock = threading.Lock()
+_stats = {}  # fingerprint -> [calls, rows, total_ms, max_ms]
+_slow = []
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"\?(?:\s*,\s*\?)+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """Normalizes sql so queries differing only in literals group together.
+
+    Literals become '?', runs of placeholders (e.g. a variable-length IN list)
+    collapse to '?, ...' and whitespace is squeezed.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDERS.sub("?, ...", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def _record(sql, ms, rows, new_call, statement_ms):
+    key = fingerprint(sql)
+    with _lock:
+        entry = _stats.setdefault(key, [0, 0, 0.0, 0.0])
+        entry[0] += new_call
+        entry[1] += rows
+        entry[2] += ms
+        entry[3] = max(entry[3], statement_ms)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """A cursor that times each statement through execute and all its fetches."""
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._sql, self._params, self._elapsed, self._logged = None, None, 0.0, False
+
+    def _begin(self, sql, params):
+        self._sql, self._params, self._elapsed, self._logged = sql, params, 0.0, False
+
+    def _add(self, start, rows, new_call=False):
+        ms = (time.perf_counter() - start) * 1000
+        self._elapsed += ms
+        _record(self._sql, ms, rows, new_call, self._elapsed)
+        if not self._logged and self._elapsed >= _state["slow_ms"]:
+            self._logged = True
+            _log_slow(self.connection, self._sql, self._params, self._elapsed)
+
+    def execute(self, sql, params=()):
+        self._begin(sql, params)
+        start = time.perf_counter()
+        super().execute(sql, params)
+        self._add(start, max(self.rowcount, 0), new_call=True)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._begin(sql, None)
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_params)
+        self._add(start, max(self.rowcount, 0), new_call=True)
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._add(start, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._add(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._add(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        row = super().__next__()
+        self._add(start, 1)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """A connection whose cursors (including conn.execute's) are instrumented."""
+
+    def cursor(self, factory=None):
+        """Returns an InstrumentedCursor unless another factory is given."""
+        return super().cursor(factory or InstrumentedCursor)
+
+
+def _log_slow(conn, sql, params, ms):
+    plan = None
+    if sql.lstrip().upper().startswith(("SELECT", "WITH")) and params is not None:
+        try:
+            # A plain cursor, so the EXPLAIN itself isn't counted
+            cursor = conn.cursor(sqlite3.Cursor)
+            plan = [
+                row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            ]
+        except sqlite3.Error:
+            pass
+    with _lock:
+        _slow.append(
+            {"fingerprint": fingerprint(sql), "sql": sql, "ms": ms, "plan": plan}
+        )
+
+
+def is_enabled():
+    return _state["enabled"]
+
+
+def enable(slow_ms=SLOW_QUERY_MS, dump_path=None):
+    """Turns instrumentation on for connections opened from now on.
+
+    Queries taking at least slow_ms are kept with their EXPLAIN QUERY PLAN.
+    If dump_path is given, the collected stats are written there as JSON when
+    the interpreter exits.
+    """
+    from db_connection import close_connections
+
+    _configure(slow_ms, dump_path)
+    close_connections()
+
+
+def _configure(slow_ms, dump_path):
+    _state["enabled"], _state["slow_ms"] = True, slow_ms
+    if dump_path and _state["dump_path"] is None:
+        atexit.register(lambda: dump(_state["dump_path"]))
+    if dump_path:
+        _state["dump_path"] = dump_path
+
+
+def disable():
+    """Turns instrumentation off for connections opened from now on."""
+    from db_connection import close_connections
+
+    _state["enabled"] = False
+    close_connections()
+
+
+def query_stats():
+    """Returns a QueryStat per fingerprint, most total time first."""
+    with _lock:
+        stats = [
+            QueryStat(key, calls, rows, total, total / calls if calls else 0.0, peak)
+            for key, (calls, rows, total, peak) in _stats.items()
+        ]
+    return sorted(stats, key=lambda stat: stat.total_ms, reverse=True)
+
+
+def slow_queries():
+    """Returns the logged slow queries as dicts (fingerprint, sql, ms, plan)."""
+    with _lock:
+        return list(_slow)
+
+
+def reset():
+    """Clears the collected stats and slow-query log."""
+    with _lock:
+        _stats.clear()
+        _slow.clear()
+
+
+def dump(path):
+    """Writes the stats table and slow-query log to path as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "queries": [stat._asdict() for stat in query_stats()],
+                "slow_queries": slow_queries(),
+            },
+            f,
+            indent=2,
+        )
+
+
+if os.environ.get(DUMP_ENV_VAR):
+    _configure(SLOW_QUERY_MS, os.environ[DUMP_ENV_VAR])
@@ -1,42 +1,19 @@
 from docx import Document
-from db_manager import (
-    get_employment,
-    get_publications,
-    get_education,
-    get_person_info,
-    get_skills,
-    get_professional_development,
-    # get_certifications,
-    get_projects,
-)
+from profile_cache import get_cached_snapshot
 from docx.shared import Pt
-from job_relavancy_scorer import score_and_rank_relevance
+from job_relavancy_scorer import score_resume
 from job_posting_scraper_ai import get_scraped_job_data
 
 
 def fetch_resume_data(db_path, person_id, search_filters=None):
-    """Fetches all resume-related data from the database."""
-    if search_filters is None:
-        search_filters = {}
-    (full_name, email, linkedin, github) = get_person_info(db_path, person_id)
-
-    return {
-        "full_name": full_name,
-        "email": email,
-        "linkedin": linkedin,
-        "github": github,
-        "education": get_education(db_path, person_id),
-        "employment": get_employment(
-            db_path, person_id
-        ),  # , search_filters["employment_filters"]),
-        "publications": get_publications(db_path, person_id),
-        "projects": get_projects(
-            db_path, person_id, fields=["Data Science"], exclude_fields=["Personal"]
-        ),
-        "personal_projects": get_projects(db_path, person_id, types=["Personal"]),
-        "professional_development": get_professional_development(db_path, person_id),
-        "skills": get_skills(db_path, person_id),
-    }
+    """Fetches all resume-related data from the database.
+
+    search_filters may hold "employment_filters", "project_filters" and
+    "personal_project_filters" (see db_manager.get_resume_snapshot). Bullet
+    columns come back as lists. Repeat renders for the same person are served
+    from the profile cache.
+    """
+    return get_cached_snapshot(db_path, person_id, search_filters, as_lists=True)
 
 
 def replace_text_while_keeping_formatting(paragraph, key, value):
@@ -160,10 +137,14 @@ def populate_resume(
             # Clear the paragraph while keeping its style
             para.clear()
 
-            for degree, institution, graduation_year, gpa in data["education"]:
-                run = para.add_run(f"{institution}, \t{graduation_year}\n")
+            for education in data["education"]:
+                run = para.add_run(
+                    f"{education.institution}, \t{education.graduation_year}\n"
+                )
                 run.bold = True
-                degree_run = para.add_run(f"\t{degree}\t GPA: {gpa}/4.0\n")
+                degree_run = para.add_run(
+                    f"\t{education.degree}\t GPA: {education.graduation_gpa}/4.0\n"
+                )
 
                 # Preserve original font settings
                 if original_font:
@@ -176,11 +157,9 @@ def populate_resume(
             # Clear the paragraph while keeping its style
             para.clear()
 
-            for title, authors, publication_date, venue, edition, pages in data[
-                "publications"
-            ]:
+            for pub in data["publications"]:
                 run = para.add_run(
-                    f"{authors}. ({publication_date}). {title}\n{venue}, {edition}, {pages}\n\n"
+                    f"{pub.authors}. ({pub.publication_date}). {pub.title}\n{pub.venue}, {pub.edition}, {pub.pages}\n\n"
                 )
                 if original_font:
                     run.font.name = original_font.name
@@ -194,23 +173,27 @@ def populate_resume(
 
             # Store the original paragraph format for resetting
             original_indent = para.paragraph_format.left_indent
-            for position in data["employment"]:
+            # Score every position's responsibilities in one batch
+            selections = score_resume(
+                job_data,
+                data["employment"],
+                db_path=db_path,
+                posting_url=job_posting_url,
+            )
+            for position, selection in zip(data["employment"], selections):
                 i += 1
-                (
-                    company,
-                    location,
-                    title,
-                    start_date,
-                    end_date,
-                    field,
-                    responsibilities,
-                    # fields,
-                ) = position
+                company = position.company
+                location = position.location
+                title = position.job_title
+                start_date = position.start_date
+                end_date = position.end_date
+                field = position.field
+                responsibilities = position.responsibilities
 
                 # if not fields:
                 #     print("No fields.")
                 if responsibilities:
-                    responsibilities = score_and_rank_relevance(job_data, position)
+                    responsibilities = selection
                 if responsibilities is None or responsibilities is []:
                     pass
                 else:
@@ -294,15 +277,13 @@ def populate_resume(
             original_indent = para.paragraph_format.left_indent
             for project in data[focus]:
                 i += 1
-                (
-                    project_name,
-                    year,
-                    technologies,
-                    project_link,
-                    field,
-                    project_type,
-                    details,
-                ) = project
+                project_name = project.project_name
+                year = project.year
+                technologies = project.technologies
+                project_link = project.project_link
+                field = project.field
+                project_type = project.project_type
+                details = project.details
 
                 print(field)
 
@@ -345,7 +326,7 @@ def populate_resume(
 
                 if details:
 
-                    for detail in details.split(";"):
+                    for detail in details:
 
                         if detail.strip():
 
@@ -380,14 +361,12 @@ def populate_resume(
 
             for dev in data["professional_development"]:
                 i += 1
-                (
-                    certification_name,
-                    issuing_organization,
-                    date_completed,
-                    context,
-                    field,
-                    covered,
-                ) = dev
+                certification_name = dev.certification_name
+                issuing_organization = dev.issuing_organization
+                date_completed = dev.date_completed
+                context = dev.context
+                field = dev.field
+                covered = dev.covered
                 print(field)
 
                 # Reset paragraph indentation for each new company
@@ -411,7 +390,7 @@ def populate_resume(
 
                 # Process details as bullet points
                 if covered:
-                    for detail in covered.split(";"):
+                    for detail in covered:
                         if detail.strip():
                             # Create a properly formatted bullet point with the dash and spaces
                             bullet_run = current_para.add_run("•\t")
@@ -439,7 +418,7 @@ def populate_resume(
             original_indent = para.paragraph_format.left_indent
 
             for skills in data["skills"]:
-                (skill, details) = skills
+                skill, details = skills.skill, skills.details
 
                 # Reset paragraph indentation for each new company
 
@@ -456,8 +435,7 @@ def populate_resume(
 
                 # Process details as bullet points
                 if details:
-                    j = 0
-                    for detail in details.split(";"):
+                    for j, detail in enumerate(details):
                         if detail.strip():
                             # Create a properly formatted bullet point with the dash and spaces
 
@@ -14,15 +14,15 @@ try:
         from db_loader import load_info
 
         db_path = "resume.db"
-        setup_db.db_builder(db_path)
-        load_info(db_path)
+        setup_db.migrate(db_path)
+        if get_person_info(db_path, 1) is None:
+            load_info(db_path)
     else:
         raise ImportError  # Force fallback if db_loader isn't available
 except ImportError:
     from db_loader_generic import load_generic
 
     db_path = "resume_generic.db"
-    setup_db.db_builder(db_path)
     load_generic(db_path)
 
 
@@ -1,15 +1,204 @@
+import re
 import sqlite3
+import threading
+from functools import lru_cache
+from date_parser import parse_month
+from db_connection import apply_concurrency_profile, connection, notify_write
+from posting_url import canonical_url
 
+# Managed indexes as (name, table, columns, unique). db_builder creates them on
+# new databases and apply_indexes brings existing databases in line.
+INDEXES = [
+    ("idx_education_person", "Education", ("person_id", "graduation_year"), False),
+    ("idx_coursework_education", "Coursework", ("education_id",), False),
+    (
+        "idx_employment_person",
+        "Employment",
+        ("person_id", "end_month", "start_month"),
+        False,
+    ),
+    ("idx_responsibilities_employment", "Responsibilities", ("employment_id",), False),
+    ("idx_projects_person", "Projects", ("person_id",), False),
+    ("idx_projectdetails_project", "ProjectDetails", ("project_id",), False),
+    ("idx_skills_person", "Skills", ("person_id",), False),
+    ("idx_skilldetails_skill", "SkillDetails", ("skill_id",), False),
+    (
+        "idx_certifications_person",
+        "Certifications",
+        ("person_id", "date_obtained"),
+        False,
+    ),
+    (
+        "idx_publications_person",
+        "Publications",
+        ("person_id", "publication_date"),
+        False,
+    ),
+    (
+        "idx_profdev_person",
+        "ProfessionalDevelopment",
+        ("person_id", "completed_month"),
+        False,
+    ),
+    ("idx_pdcovered_profdev", "PDCovered", ("prof_dev_id",), False),
+    ("idx_job_postings_url", "Job_Postings", ("application_url",), False),
+    (
+        "idx_job_postings_canonical_url",
+        "Job_Postings",
+        ("canonical_url",),
+        True,
+    ),
+    ("idx_job_postings_title", "Job_Postings", ("job_title",), False),
+]
 
-def db_builder(db_path):
-    print(f"Building database in {db_path}")
-    # Connect to the SQLite database (creates file if it doesn't exist)
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
 
-    # Create tables
-    cursor.executescript(
-        """
+def index_statements():
+    """Returns the CREATE INDEX statement for every managed index."""
+    return [
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} "
+        f"ON {table} ({', '.join(columns)})"
+        for name, table, columns, unique in INDEXES
+    ]
+
+
+# Full-text indexes as (fts table, source table, text column). Each is an
+# external-content FTS5 table kept in sync with its source by triggers.
+FTS_TABLES = [
+    ("Responsibilities_fts", "Responsibilities", "description"),
+    ("ProjectDetails_fts", "ProjectDetails", "detail"),
+    ("SkillDetails_fts", "SkillDetails", "detail"),
+    ("PDCovered_fts", "PDCovered", "covered"),
+]
+
+# Stemming tokenizer shared by every full-text index
+FTS_TOKENIZER = "porter unicode61"
+
+# Words of free-text queries
+_SEARCH_TERM = re.compile(r"\w+")
+
+
+def match_expression(query):
+    """Turns free text into an FTS5 query matching any of its words."""
+    return " OR ".join(f'"{term}"' for term in _SEARCH_TERM.findall(query))
+
+
+def fts_statements():
+    """Returns the CREATE statements for every full-text table and its triggers."""
+    statements = []
+    for fts, table, column in FTS_TABLES:
+        statements += [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{column}, content='{table}', content_rowid='id', "
+            f"tokenize='{FTS_TOKENIZER}')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts} (rowid, {column}) VALUES (new.id, new.{column}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts} ({fts}, rowid, {column}) "
+            f"VALUES ('delete', old.id, old.{column}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts} ({fts}, rowid, {column}) "
+            f"VALUES ('delete', old.id, old.{column}); "
+            f"INSERT INTO {fts} (rowid, {column}) VALUES (new.id, new.{column}); END",
+        ]
+    return statements
+
+
+def apply_fts(db_path):
+    """Creates the full-text tables on an existing database and indexes its rows."""
+    with connection(db_path) as conn:
+        for statement in fts_statements():
+            conn.execute(statement)
+        for fts, _, _ in FTS_TABLES:
+            conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    print("Full-text indexes rebuilt.")
+
+
+def apply_indexes(db_path):
+    """Creates missing managed indexes on an existing database.
+
+    Indexes named idx_* that are no longer in INDEXES, or whose definition
+    has changed, are dropped (and rebuilt). A unique index that can't be
+    built because of duplicate rows is reported and skipped so the remaining
+    indexes are still applied.
+    """
+    with connection(db_path) as conn:
+        _apply_indexes(conn.cursor())
+    print("Indexes applied.")
+
+
+def _apply_indexes(cursor):
+    wanted = {
+        name: statement.replace("IF NOT EXISTS ", "")
+        for (name, _, _, _), statement in zip(INDEXES, index_statements())
+    }
+    existing = cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'"
+    ).fetchall()
+    for name, sql in existing:
+        if wanted.get(name) != sql:
+            cursor.execute(f"DROP INDEX {name}")
+            print(f"Dropped outdated index {name}")
+
+    for statement in index_statements():
+        try:
+            cursor.execute(statement)
+        except (sqlite3.IntegrityError, sqlite3.OperationalError) as e:
+            print(f"❌ Could not apply index ({e}): {statement}")
+
+    cursor.execute("PRAGMA optimize")
+
+
+# Sortable YYYYMM columns derived from free-text dates, as
+# (table, column, source date column)
+SORT_DATE_COLUMNS = [
+    ("Employment", "start_month", "start_date"),
+    ("Employment", "end_month", "end_date"),
+    ("ProfessionalDevelopment", "completed_month", "date_completed"),
+]
+
+
+def add_sort_date_columns(db_path):
+    """Adds and backfills the normalized date columns on an existing database."""
+    with connection(db_path) as conn:
+        conn.create_function("parse_month", 1, parse_month, deterministic=True)
+        for table, column, source in SORT_DATE_COLUMNS:
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+            conn.execute(f"UPDATE {table} SET {column} = parse_month({source})")
+    print("Sort date columns backfilled.")
+
+
+def add_canonical_url_column(db_path):
+    """Adds and backfills Job_Postings.canonical_url on an existing database.
+
+    Postings whose URLs canonicalize to the same key are duplicates; only the
+    first one scraped (lowest id) is kept so the unique index can be built.
+    """
+    with connection(db_path) as conn:
+        conn.create_function("canonical_url", 1, canonical_url, deterministic=True)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(Job_Postings)")}
+        if "canonical_url" not in columns:
+            conn.execute("ALTER TABLE Job_Postings ADD COLUMN canonical_url TEXT")
+        conn.execute(
+            "UPDATE Job_Postings SET canonical_url = canonical_url(application_url)"
+        )
+        removed = conn.execute(
+            """
+            DELETE FROM Job_Postings
+            WHERE canonical_url IS NOT NULL AND id NOT IN (
+                SELECT MIN(id) FROM Job_Postings GROUP BY canonical_url
+            )
+            """
+        ).rowcount
+    if removed:
+        print(f"Removed {removed} duplicate job postings.")
+    print("Canonical posting URLs backfilled.")
+
+
+# Table definitions for a new database. Existing databases are brought up to
+# date by the MIGRATIONS below rather than by editing these in place.
+SCHEMA = """
     CREATE TABLE IF NOT EXISTS Personal_Info (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         full_name TEXT,
@@ -52,7 +241,9 @@ def db_builder(db_path):
             job_title TEXT,
             start_date TEXT,
             end_date TEXT,
-            field TEXT
+            field TEXT,
+            start_month INTEGER,
+            end_month INTEGER
     );
 
     CREATE TABLE IF NOT EXISTS Responsibilities (
@@ -120,7 +311,8 @@ def db_builder(db_path):
         issuing_organization TEXT,
         date_completed INTEGER,
         context TEXT,
-        field TEXT
+        field TEXT,
+        completed_month INTEGER
     );
     
     CREATE TABLE IF NOT EXISTS PDCovered (
@@ -148,14 +340,166 @@ def db_builder(db_path):
             posting_date TEXT,
             job_id TEXT,
             hiring_manager TEXT,
-            hiring_address TEXT
+            hiring_address TEXT,
+            canonical_url TEXT
     );
 
+    CREATE TABLE IF NOT EXISTS Embeddings (
+            model TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            dtype TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL,
+            last_used INTEGER NOT NULL,
+            PRIMARY KEY (model, text_hash)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS Posting_Embeddings (
+            posting_id INTEGER NOT NULL,
+            model TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            dtype TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL,
+            PRIMARY KEY (posting_id, model),
+            FOREIGN KEY (posting_id) REFERENCES Job_Postings(id) ON DELETE CASCADE
+    ) WITHOUT ROWID;
+
+"""
+
+
+def create_tables(db_path):
+    """Creates any missing tables (existing tables are left unchanged)."""
+    with connection(db_path) as conn:
+        conn.executescript(SCHEMA)
+
+
+# Ordered schema changes as (version, description, step). Each step takes the
+# database path and must be safe to re-run. Append new steps; never reorder.
+MIGRATIONS = [
+    (1, "create tables", create_tables),
+    (2, "add sort date columns", add_sort_date_columns),
+    (3, "add canonical job posting URLs", add_canonical_url_column),
+    (4, "add full-text indexes", apply_fts),
+    (5, "apply managed indexes", apply_indexes),
+    (6, "add embedding cache", create_tables),
+    (7, "add job posting embeddings", create_tables),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _create_version_table(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def _record_versions(cursor, versions):
+    cursor.executemany(
+        "INSERT OR IGNORE INTO schema_version (version, description) VALUES (?, ?)",
+        versions,
+    )
+
+
+def schema_version(db_path):
+    """Returns the highest migration applied to the database (0 if none)."""
+    with connection(db_path) as conn:
+        try:
+            (version,) = conn.execute(
+                "SELECT MAX(version) FROM schema_version"
+            ).fetchone()
+        except sqlite3.OperationalError:  # No schema_version table yet
+            return 0
+    return version or 0
+
+
+def migrate(db_path):
+    """Brings the database at db_path up to SCHEMA_VERSION.
+
+    Pending MIGRATIONS run in order and each is recorded in schema_version
+    once it succeeds, so a failed run resumes where it stopped. A database
+    that is already current costs a single query. Returns the new version.
     """
+    current = schema_version(db_path)
+    if current >= SCHEMA_VERSION:
+        return current
+
+    with connection(db_path) as conn:
+        _create_version_table(conn)
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        print(f"Applying migration {version}: {description}")
+        step(db_path)
+        with connection(db_path) as conn:
+            _record_versions(conn, [(version, description)])
+    return SCHEMA_VERSION
+
+
+def _build_schema(conn):
+    """Creates the current schema, stamped with every migration, on conn."""
+    cursor = conn.cursor()
+
+    # Create tables
+    cursor.executescript(SCHEMA)
+
+    # Create lookup indexes
+    for statement in index_statements():
+        cursor.execute(statement)
+
+    # Create full-text indexes for keyword search
+    for statement in fts_statements():
+        cursor.execute(statement)
+
+    # A new database already has every migration's changes
+    _create_version_table(cursor)
+    _record_versions(
+        cursor, [(version, description) for version, description, _ in MIGRATIONS]
     )
 
-    # Commit and close
-    conn.commit()
-    conn.close()
+
+def db_builder(db_path, concurrent=False):
+    print(f"Building database in {db_path}")
+    # Connect to the SQLite database (creates file if it doesn't exist)
+    with connection(db_path) as conn:
+        # Switch the file to WAL for multi-process use (see db_connection)
+        if concurrent:
+            apply_concurrency_profile(conn)
+        _build_schema(conn)
 
     print("Database setup complete! 🎉")
+
+
+_template_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _schema_template():
+    """Returns an in-memory database holding the current, empty schema."""
+    template = sqlite3.connect(":memory:", check_same_thread=False)
+    _build_schema(template)
+    template.commit()
+    return template
+
+
+def clone_schema(db_path):
+    """Replaces the database at db_path with an empty, current one.
+
+    The schema is built once per process into an in-memory template and
+    copied with the SQLite backup API, which is far cheaper than db_builder.
+    Meant for tests and batch jobs, typically with ':memory:' or a shared
+    in-memory URI such as 'file:batch?mode=memory&cache=shared' (which lives
+    until its last connection is closed).
+    """
+    with _template_lock:
+        template = _schema_template()
+        with connection(db_path) as conn:
+            template.backup(conn)
+    notify_write(db_path)
@@ -1,9 +1,36 @@
+import asyncio
+import inspect
+import json
+import threading
+import time
+import multiprocessing
 import os
-from setup_db import db_builder
+import sqlite3
+from setup_db import (
+    db_builder,
+    apply_indexes,
+    add_sort_date_columns,
+    add_canonical_url_column,
+    clone_schema,
+    migrate,
+    schema_version,
+    SCHEMA_VERSION,
+)
+from date_parser import parse_month, PRESENT_MONTH
+from db_connection import (
+    connection,
+    close_connections,
+    set_concurrency_profile,
+    set_pooling,
+)
 from db_manager import (
+    execute_query,
     fetch_data,
+    fetch_one_data,
     add_education,
     add_coursework,
+    bulk_add_coursework,
+    bulk_insert,
     add_certification,
     add_publication,
     add_personal_info,
@@ -14,25 +41,41 @@ from db_manager import (
     get_person_info,
     get_education_with_coursework,
     add_employment,
+    add_professional_development,
     get_employment,
+    add_job_posting,
+    get_job_posting,
+    get_job_postings,
+    get_professional_development,
+    get_projects,
+    get_skills,
+    add_project,
+    add_skills,
+    get_resume_snapshot,
+    get_resume_snapshots,
+    get_employment_many,
+    search_profile,
 )
+from db_loader_generic import load_generic, SAMPLE_PROFILE
+from profile_loader import load_profile
+from db_records import JobPosting
+from posting_url import canonical_url
+from profile_cache import get_cached_snapshot, cache_stats, reset_cache_stats
+import async_db
+import db_manager
+import query_stats
 import pytest
 
-db_test_path = r"resume_test.db"
-
-
-def remove_test_db():
-    """Removes the test database file if it exists."""
-    if os.path.exists(db_test_path):
-        os.remove(db_test_path)
+# Shared in-memory database, dropped when the fixture closes its connections
+db_test_path = "file:resume_test?mode=memory&cache=shared"
 
 
 @pytest.fixture(scope="function", autouse=True)
 def setup_teardown():
     """Setup and teardown for each test."""
-    remove_test_db()
-    db_builder(db_test_path)
+    clone_schema(db_test_path)
     yield  # Run the test
+    close_connections()
 
 
 def test_add_personal_info():
@@ -150,8 +193,10 @@ def test_add_employment():
     assert results[0][5] == "June 2020"
     assert results[0][6] == "Current"
     assert results[0][7] == "General"
-    assert results[0][8] == "Did work, Spoke to clients"
-    assert results[0][9] == "General, General"
+    assert results[0][8] == 202006
+    assert results[0][9] == PRESENT_MONTH
+    assert results[0][10] == "Did work, Spoke to clients"
+    assert results[0][11] == "General, General"
 
 
 def test_get_personal_info():
@@ -292,3 +337,790 @@ def test_get_employment():
         "General",
         "Did work;Spoke to clients",
     )
+
+
+def test_connection_is_reused():
+    with connection(db_test_path) as first:
+        pass
+    with connection(db_test_path) as second:
+        pass
+    assert first is second
+
+
+def test_connection_reopens_rebuilt_database(tmp_path):
+    path = str(tmp_path / "rebuilt.db")
+    db_builder(path)
+    add_personal_info(path, "John Smith", None, None, None, None, None)
+    assert len(fetch_data(path, "SELECT * FROM Personal_Info")) == 1
+    os.remove(path)
+    db_builder(path)
+    assert fetch_data(path, "SELECT * FROM Personal_Info") == []
+
+
+def test_clone_schema_matches_db_builder(tmp_path):
+    path = str(tmp_path / "built.db")
+    db_builder(path)
+    assert schema_snapshot(db_test_path) == schema_snapshot(path)
+    assert schema_version(db_test_path) == SCHEMA_VERSION
+
+
+def test_clone_schema_resets_database():
+    add_personal_info(db_test_path, "John Smith", None, None, None, None, None)
+    assert get_cached_snapshot(db_test_path, 1) is not None
+    clone_schema(db_test_path)
+    assert fetch_data(db_test_path, "SELECT * FROM Personal_Info") == []
+    assert get_cached_snapshot(db_test_path, 1) is None
+
+
+def test_in_memory_database_is_private_per_thread():
+    db_builder(":memory:")
+    add_skills(":memory:", 1, "Programming", ["Python"])
+    assert get_skills(":memory:", 1) == [("Programming", "Python")]
+    other = []
+    thread = threading.Thread(target=lambda: other.append(schema_version(":memory:")))
+    thread.start()
+    thread.join()
+    assert other == [0]
+
+
+def test_nested_connection_rolls_back_outer_transaction():
+    with pytest.raises(sqlite3.IntegrityError):
+        with connection(db_test_path) as conn:
+            add_personal_info(db_test_path, "John Smith", None, None, None, None, None)
+            conn.execute("INSERT INTO Personal_Info (id) VALUES (1)")
+    assert fetch_data(db_test_path, "SELECT * FROM Personal_Info") == []
+
+
+def test_nested_connection_failure_keeps_outer_work():
+    with connection(db_test_path):
+        add_personal_info(db_test_path, "John Smith", None, None, None, None, None)
+        with pytest.raises(sqlite3.OperationalError):
+            with connection(db_test_path) as conn:
+                conn.execute("INSERT INTO Personal_Info (full_name) VALUES ('Jane')")
+                conn.execute("INSERT INTO Missing_Table VALUES (1)")
+    assert fetch_data(db_test_path, "SELECT full_name FROM Personal_Info") == [
+        ("John Smith",)
+    ]
+
+
+def test_bulk_add_coursework():
+    rows = (
+        (1, f"Course {i}", f"CRS {i}", "Autumn", 2012, 3.5, 5, "Chemistry")
+        for i in range(200)
+    )
+    course_ids = bulk_add_coursework(db_test_path, rows)
+    assert course_ids == list(range(1, 201))
+    results = fetch_data(db_test_path, "SELECT id, course_id FROM Coursework")
+    assert len(results) == 200
+    assert results[-1] == (200, "CRS 199")
+    assert bulk_add_coursework(db_test_path, []) == []
+
+
+def test_bulk_insert_rejects_bad_identifiers():
+    with pytest.raises(ValueError):
+        bulk_insert(db_test_path, "Skills; DROP TABLE Skills", ("skill",), [])
+
+
+def query_plans(fn):
+    """Runs fn and returns the EXPLAIN QUERY PLAN details of each SELECT it issued."""
+    statements = []
+    with connection(db_test_path) as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            fn()
+        finally:
+            conn.set_trace_callback(None)
+        return [
+            [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            for sql in statements
+            if sql.lstrip().upper().startswith("SELECT")
+        ]
+
+
+@pytest.mark.parametrize(
+    "fetch, expected_indexes",
+    [
+        (
+            lambda: get_employment(db_test_path, 1),
+            ["idx_employment_person", "idx_responsibilities_employment"],
+        ),
+        (lambda: get_education(db_test_path, 1), ["idx_education_person"]),
+        (
+            lambda: get_education_with_coursework(db_test_path, 1),
+            ["idx_education_person", "idx_coursework_education"],
+        ),
+        (
+            lambda: get_projects(db_test_path, 1, types=["Personal"]),
+            ["idx_projects_person", "idx_projectdetails_project"],
+        ),
+        (
+            lambda: get_skills(db_test_path, 1),
+            ["idx_skills_person", "idx_skilldetails_skill"],
+        ),
+        (
+            lambda: get_professional_development(db_test_path, 1),
+            ["idx_profdev_person", "idx_pdcovered_profdev"],
+        ),
+        (lambda: get_publications(db_test_path, 1), ["idx_publications_person"]),
+        (lambda: get_certifications(db_test_path, 1), ["idx_certifications_person"]),
+        (
+            lambda: get_job_postings(db_test_path, job_url="https://example.com"),
+            ["idx_job_postings_canonical_url"],
+        ),
+        (
+            lambda: get_job_posting(db_test_path, "https://example.com"),
+            ["idx_job_postings_canonical_url"],
+        ),
+    ],
+)
+def test_hot_queries_use_indexes(fetch, expected_indexes):
+    plans = query_plans(fetch)
+    assert plans
+    details = [detail for plan in plans for detail in plan]
+    assert not [d for d in details if d.startswith("SCAN")], details
+    for index in expected_indexes:
+        assert any(f"USING INDEX {index}" in d for d in details), details
+
+
+def test_apply_indexes_to_existing_database():
+    with connection(db_test_path) as conn:
+        conn.execute("DROP INDEX idx_employment_person")
+        conn.execute("CREATE INDEX idx_stale ON Skills (skill)")
+    apply_indexes(db_test_path)
+    names = {
+        row[0]
+        for row in fetch_data(
+            db_test_path, "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+    }
+    assert "idx_employment_person" in names
+    assert "idx_stale" not in names
+
+
+def test_apply_indexes_rebuilds_changed_definitions():
+    with connection(db_test_path) as conn:
+        conn.execute("DROP INDEX idx_employment_person")
+        conn.execute("CREATE INDEX idx_employment_person ON Employment (person_id)")
+    apply_indexes(db_test_path)
+    (sql,) = fetch_one_data(
+        db_test_path,
+        "SELECT sql FROM sqlite_master WHERE name = 'idx_employment_person'",
+    )
+    assert "end_month" in sql
+
+
+def test_job_posting_canonical_url_is_unique():
+    with pytest.raises(sqlite3.IntegrityError):
+        with connection(db_test_path) as conn:
+            for _ in range(2):
+                conn.execute(
+                    "INSERT INTO Job_Postings (canonical_url) VALUES ('https://example.com')"
+                )
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://www.Example.com/jobs/42/",
+        "https://example.com:443/jobs/42?utm_source=linkedin&trk=abc",
+        "https://example.com/jobs/42?q=data+scientist",
+    ],
+)
+def test_canonical_url(url):
+    assert canonical_url(url) == "https://example.com/jobs/42"
+
+
+def test_canonical_url_keeps_identifying_params():
+    assert canonical_url("https://example.com/view?b=2&jobId=7&utm_medium=x") == (
+        "https://example.com/view?b=2&jobId=7"
+    )
+
+
+def test_add_job_posting_upserts_on_canonical_url():
+    job = dict.fromkeys(JobPosting._fields, "")
+    job.update(job_title="Analyst", application_url="https://example.com/jobs/42")
+    first = add_job_posting(db_test_path, job)
+    assert isinstance(first, JobPosting)
+
+    job.update(job_title="Senior Analyst")
+    second = add_job_posting(
+        db_test_path, job, posting_url="http://www.example.com/jobs/42/?utm_source=x"
+    )
+    assert second.job_title == "Senior Analyst"
+    assert len(get_job_postings(db_test_path)) == 1
+    assert get_job_posting(db_test_path, "https://EXAMPLE.com/jobs/42") == second
+    assert get_job_posting(db_test_path, "https://example.com/jobs/43") is None
+
+
+def test_add_canonical_url_column_merges_duplicates():
+    with connection(db_test_path) as conn:
+        conn.execute("DROP INDEX idx_job_postings_canonical_url")
+        conn.executemany(
+            "INSERT INTO Job_Postings (job_title, application_url) VALUES (?, ?)",
+            [
+                ("First", "https://example.com/jobs/42"),
+                ("Second", "https://www.example.com/jobs/42?utm_source=x"),
+                ("Other", "https://example.com/jobs/43"),
+            ],
+        )
+    add_canonical_url_column(db_test_path)
+    apply_indexes(db_test_path)
+    titles = [posting.job_title for posting in get_job_postings(db_test_path)]
+    assert titles == ["First", "Other"]
+    assert get_job_posting(db_test_path, "https://example.com/jobs/42/").job_title == (
+        "First"
+    )
+
+
+@pytest.mark.parametrize(
+    "date_str, expected",
+    [
+        ("Jan. 2010", 201001),
+        ("June 2020", 202006),
+        ("Sept. 2019", 201909),
+        ("2020-06-15", 202006),
+        ("6/15/2020", 202006),
+        ("2005", 200500),
+        (2017, 201700),
+        ("Current", PRESENT_MONTH),
+        ("n/a", None),
+        (None, None),
+    ],
+)
+def test_parse_month(date_str, expected):
+    assert parse_month(date_str) == expected
+
+
+def test_get_employment_orders_by_normalized_dates():
+    for company, start, end in [
+        ("Old Co.", "Feb. 2012", "Dec. 2015"),
+        ("Now Co.", "2021-03", "Current"),
+        ("Mid Co.", "Jan. 2016", "Sept. 2020"),
+    ]:
+        add_employment(
+            db_test_path, 1, company, "Seattle", "Worker", start, end, "General", [], []
+        )
+    assert [row[0] for row in get_employment(db_test_path, 1)] == [
+        "Now Co.",
+        "Mid Co.",
+        "Old Co.",
+    ]
+    plans = query_plans(lambda: get_employment(db_test_path, 1))
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plans[0]
+
+
+def test_get_professional_development_orders_by_normalized_dates():
+    for name, completed in [("First", "Jan. 2010"), ("Second", "2019-05")]:
+        add_professional_development(
+            db_test_path, 1, name, "Org", completed, "Certified", "General", ["Topic"]
+        )
+    assert [row[0] for row in get_professional_development(db_test_path, 1)] == [
+        "Second",
+        "First",
+    ]
+
+
+def test_add_sort_date_columns_backfills_existing_rows():
+    with connection(db_test_path) as conn:
+        conn.execute(
+            "INSERT INTO Employment (person_id, start_date, end_date) VALUES (1, 'May 2011', 'Present')"
+        )
+    add_sort_date_columns(db_test_path)
+    assert fetch_data(
+        db_test_path, "SELECT start_month, end_month FROM Employment"
+    ) == [(201105, PRESENT_MONTH)]
+
+
+def test_get_resume_snapshot_matches_getters():
+    load_generic(db_test_path)
+    add_project(
+        db_test_path, 1, "Model", 2024, "Python", None, "Data Science", "Work", ["A"]
+    )
+    add_project(
+        db_test_path, 1, "Site", 2023, "HTML", None, "Web", "Personal", ["B", "C"]
+    )
+    full_name, email, linkedin, github = get_person_info(db_test_path, 1)
+    assert get_resume_snapshot(db_test_path, 1) == {
+        "full_name": full_name,
+        "email": email,
+        "linkedin": linkedin,
+        "github": github,
+        "education": get_education(db_test_path, 1),
+        "employment": get_employment(db_test_path, 1),
+        "publications": get_publications(db_test_path, 1),
+        "projects": get_projects(
+            db_test_path, 1, fields=["Data Science"], exclude_fields=["Personal"]
+        ),
+        "personal_projects": get_projects(db_test_path, 1, types=["Personal"]),
+        "professional_development": get_professional_development(db_test_path, 1),
+        "skills": get_skills(db_test_path, 1),
+    }
+
+
+def test_get_resume_snapshot_filters_and_missing_person():
+    load_generic(db_test_path)
+    snapshot = get_resume_snapshot(
+        db_test_path, 1, {"employment_filters": {"resp_fields": ["Customer Service"]}}
+    )
+    assert snapshot["employment"] == [
+        (
+            "Company Inc.",
+            "Seattle",
+            "Worker",
+            "Jan. 2010",
+            "Current",
+            "General",
+            "Helped customers",
+        )
+    ]
+    assert get_resume_snapshot(db_test_path, 2) is None
+
+
+def test_profile_cache_hits_and_write_invalidation():
+    load_generic(db_test_path)
+    reset_cache_stats()
+    first = get_cached_snapshot(db_test_path, 1)
+    assert get_cached_snapshot(db_test_path, 1) is first
+    assert get_cached_snapshot(db_test_path, 1, {}) is first
+    assert cache_stats()["hits"] == 2
+    assert cache_stats()["misses"] == 1
+
+    add_skills(db_test_path, 1, "Python", ["pandas"])
+    refreshed = get_cached_snapshot(db_test_path, 1)
+    assert refreshed is not first
+    assert ("Python", "pandas") in refreshed["skills"]
+    assert cache_stats()["misses"] == 2
+
+
+def test_profile_cache_sees_writes_from_other_connections():
+    load_generic(db_test_path)
+    first = get_cached_snapshot(db_test_path, 1)
+    conn = sqlite3.connect(db_test_path)
+    conn.execute("UPDATE Personal_Info SET full_name = 'Jane Smith' WHERE id = 1")
+    conn.commit()
+    conn.close()
+    refreshed = get_cached_snapshot(db_test_path, 1)
+    assert first["full_name"] == "John Smith"
+    assert refreshed["full_name"] == "Jane Smith"
+
+
+def test_profile_cache_hits_without_connection_pooling(tmp_path):
+    # On disk, since unpooled connections don't keep a memory database alive
+    db_path = str(tmp_path / "unpooled.db")
+    clone_schema(db_path)
+    load_generic(db_path)
+    set_pooling(False)
+    try:
+        reset_cache_stats()
+        first = get_cached_snapshot(db_path, 1)
+        assert get_cached_snapshot(db_path, 1) is first
+        assert cache_stats()["hits"] == 1
+        assert cache_stats()["invalidations"] == 0
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE Personal_Info SET full_name = 'Jane Smith' WHERE id = 1")
+        conn.commit()
+        conn.close()
+        assert get_cached_snapshot(db_path, 1)["full_name"] == "Jane Smith"
+    finally:
+        set_pooling(True)
+
+
+def _stress_reader(db_path, rounds, errors):
+    set_concurrency_profile(True)
+    try:
+        for _ in range(rounds):
+            if get_resume_snapshot(db_path, 1) is None:
+                errors.put("snapshot read failed")
+            fetch_data(db_path, "SELECT COUNT(*) FROM Job_Postings")
+    except sqlite3.Error as e:
+        errors.put(f"reader: {e}")
+
+
+def _stress_writer(db_path, rounds, errors):
+    set_concurrency_profile(True)
+    try:
+        for i in range(rounds):
+            execute_query(
+                db_path,
+                "INSERT INTO Job_Postings (job_title, application_url) VALUES (?, ?)",
+                ("Engineer", f"https://example.com/jobs/{i}"),
+            )
+    except sqlite3.Error as e:
+        errors.put(f"writer: {e}")
+
+
+def test_concurrent_readers_and_writer(tmp_path):
+    db_path = str(tmp_path / "resume_stress.db")
+    db_builder(db_path, concurrent=True)
+    add_personal_info(db_path, "John Smith", None, None, None, None, None)
+    assert fetch_one_data(db_path, "PRAGMA journal_mode")[0] == "wal"
+
+    errors = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_stress_reader, args=(db_path, 200, errors))
+        for _ in range(4)
+    ]
+    workers.append(
+        multiprocessing.Process(target=_stress_writer, args=(db_path, 200, errors))
+    )
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+
+    assert [worker.exitcode for worker in workers] == [0] * len(workers)
+    assert errors.empty(), errors.get()
+    assert fetch_one_data(db_path, "SELECT COUNT(*) FROM Job_Postings")[0] == 200
+    close_connections(db_path)
+
+
+def test_getters_return_native_lists():
+    add_personal_info(db_test_path, "John Smith", None, None, None, None, None)
+    add_employment(
+        db_test_path,
+        1,
+        "Job Inc.",
+        "Seattle, WA",
+        "Worker",
+        "June 2020",
+        "Current",
+        "General",
+        ["Built tools; automated reports", "Spoke to clients"],
+        ["General", "General"],
+    )
+    add_employment(
+        db_test_path, 1, "Old Co.", "Tacoma", "Clerk", "2010", "2012", "General", [], []
+    )
+    add_skills(db_test_path, 1, "Python", ["pandas", "numpy"])
+    add_skills(db_test_path, 1, "Writing", None)
+    add_professional_development(
+        db_test_path, 1, "Course", "Org", "2019", "Certified", "General", ["A;B"]
+    )
+    add_project(db_test_path, 1, "Site", 2023, "HTML", None, "Web", "Personal", None)
+
+    employment = get_employment(db_test_path, 1, as_lists=True)
+    assert employment[0][6] == ["Built tools; automated reports", "Spoke to clients"]
+    assert employment[1][6] == []
+    assert get_skills(db_test_path, 1, as_lists=True) == [
+        ("Python", ["pandas", "numpy"]),
+        ("Writing", []),
+    ]
+    assert get_professional_development(db_test_path, 1, as_lists=True)[0][5] == ["A;B"]
+    assert get_projects(db_test_path, 1, as_lists=True)[0][6] == []
+
+    snapshot = get_resume_snapshot(db_test_path, 1, as_lists=True)
+    assert snapshot["employment"] == employment
+    assert snapshot["skills"] == get_skills(db_test_path, 1, as_lists=True)
+    assert snapshot["personal_projects"] == get_projects(
+        db_test_path, 1, types=["Personal"], as_lists=True
+    )
+
+
+def test_getters_return_named_records():
+    load_generic(db_test_path)
+    person = get_person_info(db_test_path, 1)
+    assert person.full_name == "John Smith"
+    position = get_employment(db_test_path, 1)[0]
+    assert position.job_title == "Worker"
+    assert position.end_date == "Current"
+    assert not hasattr(position, "__dict__")
+    assert get_education(db_test_path, 1)[0].graduation_gpa == 3.75
+    assert get_certifications(db_test_path, 1)[0].issuing_organization == "Studs"
+    snapshot = get_resume_snapshot(db_test_path, 1, as_lists=True)
+    assert snapshot["skills"][0].details == ["Working hard", "Don't stop"]
+    assert snapshot["professional_development"][0].covered == ["Working Hard"]
+
+
+def test_search_profile_ranks_and_scopes_hits():
+    add_employment(
+        db_test_path,
+        1,
+        "Job Inc.",
+        "Seattle, WA",
+        "Analyst",
+        "June 2020",
+        "Current",
+        "Data",
+        ["Built Python data pipelines", "Analyzed data with Python and SQL"],
+        ["Data", "Data"],
+    )
+    add_skills(db_test_path, 1, "Programming", ["Python", "R"])
+    add_skills(db_test_path, 2, "Programming", ["Python"])
+
+    hits = search_profile(db_test_path, 1, "python sql")
+    assert sorted(hit.section for hit in hits) == ["employment", "employment", "skills"]
+    assert hits[0].text == "Analyzed data with Python and SQL"
+    assert hits[0].item == "Analyst"
+    assert hits == sorted(hits, key=lambda hit: hit.score)
+    assert len(search_profile(db_test_path, 1, "python", limit=2)) == 2
+    assert search_profile(db_test_path, 1, '"*') == []
+
+
+def test_search_profile_follows_updates_and_deletes():
+    add_skills(db_test_path, 1, "Tools", ["Docker"])
+    assert search_profile(db_test_path, 1, "dockers")  # Porter stemming
+    execute_query(db_test_path, "UPDATE SkillDetails SET detail = 'Kubernetes'")
+    assert search_profile(db_test_path, 1, "docker") == []
+    assert search_profile(db_test_path, 1, "kubernetes")[0].item == "Tools"
+    execute_query(db_test_path, "DELETE FROM SkillDetails")
+    assert search_profile(db_test_path, 1, "kubernetes") == []
+
+
+def schema_snapshot(path):
+    return sorted(
+        fetch_data(
+            path,
+            "SELECT type, name, sql FROM sqlite_master WHERE name != 'sqlite_sequence'",
+        )
+    )
+
+
+def test_migrate_new_database_matches_db_builder(tmp_path):
+    path = str(tmp_path / "migrated.db")
+    assert migrate(path) == SCHEMA_VERSION
+    assert schema_snapshot(path) == schema_snapshot(db_test_path)
+
+
+def test_migrate_is_a_no_op_when_current(capsys):
+    assert schema_version(db_test_path) == SCHEMA_VERSION
+    capsys.readouterr()
+    assert migrate(db_test_path) == SCHEMA_VERSION
+    assert capsys.readouterr().out == ""
+
+
+def test_migrate_upgrades_legacy_database(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    with connection(path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE Employment (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, person_id INTEGER,
+                company TEXT, location TEXT, job_title TEXT, start_date TEXT,
+                end_date TEXT, field TEXT
+            );
+            INSERT INTO Employment (person_id, company, start_date, end_date)
+            VALUES (1, 'Job Inc.', 'June 2020', 'Current');
+            """
+        )
+    close_connections()
+
+    migrate(path)
+    assert schema_version(path) == SCHEMA_VERSION
+    assert fetch_one_data(path, "SELECT start_month, end_month FROM Employment") == (
+        202006,
+        PRESENT_MONTH,
+    )
+    assert get_employment(path, 1)[0].company == "Job Inc."
+
+
+def test_load_generic_keeps_existing_data(tmp_path):
+    path = str(tmp_path / "generic.db")
+    load_generic(path)
+    count = fetch_one_data(path, "SELECT COUNT(*) FROM Employment")
+    load_generic(path)
+    assert fetch_one_data(path, "SELECT COUNT(*) FROM Employment") == count
+
+
+def test_query_fingerprint():
+    assert query_stats.fingerprint(
+        "SELECT *  FROM t\n WHERE a = 'x' AND b IN (?, ?, ?) LIMIT 10"
+    ) == ("SELECT * FROM t WHERE a = ? AND b IN (?, ...) LIMIT ?")
+
+
+def test_query_stats_and_slow_log(tmp_path):
+    query_stats.reset()
+    query_stats.enable(slow_ms=0)
+    try:
+        # Enabling closes pooled connections, dropping the in-memory database
+        clone_schema(db_test_path)
+        add_skills(db_test_path, 1, "Programming", ["Python", "SQL"])
+        get_skills(db_test_path, 1)
+        get_skills(db_test_path, 1)
+        fetch_data(db_test_path, "SELECT skill FROM Skills WHERE id = 1")
+    finally:
+        query_stats.disable()
+
+    stats = {stat.fingerprint: stat for stat in query_stats.query_stats()}
+    (skills,) = [
+        stat
+        for key, stat in stats.items()
+        if key.startswith("SELECT") and "SkillDetails" in key
+    ]
+    assert skills.calls == 2
+    assert skills.rows == 2
+    assert any("INSERT INTO SkillDetails" in key for key in stats)
+    assert stats["SELECT skill FROM Skills WHERE id = ?"].calls == 1
+    slow = query_stats.slow_queries()
+    assert any(
+        "USING INDEX idx_skills_person" in " ".join(q["plan"] or []) for q in slow
+    )
+
+    path = tmp_path / "stats.json"
+    query_stats.dump(path)
+    dumped = json.loads(path.read_text())
+    assert len(dumped["queries"]) == len(stats)
+    assert dumped["slow_queries"]
+
+    query_stats.reset()
+    get_skills(db_test_path, 1)
+    assert query_stats.query_stats() == []
+
+
+def test_async_facade_matches_sync_calls():
+    async def pipeline():
+        await async_db.add_skills(db_test_path, 1, "Programming", ["Python", "SQL"])
+        skills, info, thread = await asyncio.gather(
+            async_db.get_skills(db_test_path, 1, as_lists=True),
+            async_db.get_person_info(db_test_path, 1),
+            async_db.run(threading.current_thread),
+        )
+        return skills, info, thread
+
+    try:
+        skills, info, thread = asyncio.run(pipeline())
+    finally:
+        async_db.shutdown()
+    assert skills == get_skills(db_test_path, 1, as_lists=True)
+    assert info is None
+    assert thread is not threading.current_thread()
+    assert async_db.get_skills.__wrapped__ is get_skills
+
+
+def test_async_facade_wraps_every_public_db_manager_function():
+    public = {
+        name
+        for name, fn in inspect.getmembers(db_manager, inspect.isfunction)
+        if fn.__module__ == db_manager.__name__ and not name.startswith("_")
+    }
+    for name in public:
+        assert getattr(async_db, name).__wrapped__ is getattr(db_manager, name)
+
+
+def test_async_facade_does_not_block_event_loop():
+    async def pipeline():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await async_db.run(time.sleep, 0.05)
+        task.cancel()
+        return ticks
+
+    try:
+        assert asyncio.run(pipeline()) > 1
+    finally:
+        async_db.shutdown()
+
+
+def test_load_profile_from_jsonl(tmp_path):
+    seed = tmp_path / "profile.jsonl"
+    records = [
+        {"section": "personal_info", "full_name": "Jane Doe"},
+        {"section": "employment", "company": "A", "start_date": "2019-03"},
+        {"section": "responsibilities", "description": "Built models"},
+        {"section": "employment", "company": "B", "start_date": "June 2021"},
+        {"section": "responsibilities", "description": "Led a team"},
+        {"section": "responsibilities", "description": "Hired analysts"},
+        {"section": "job_postings", "application_url": "http://www.example.com/j/1"},
+    ]
+    seed.write_text("\n".join(json.dumps(record) for record in records))
+
+    counts = load_profile(db_test_path, str(seed))
+    assert counts["responsibilities"] == 3
+    jobs = get_employment(db_test_path, 1, as_lists=True)
+    assert [(job.company, job.responsibilities) for job in jobs] == [
+        ("B", ["Led a team", "Hired analysts"]),
+        ("A", ["Built models"]),
+    ]
+    assert fetch_one_data(db_test_path, "SELECT start_month FROM Employment") == (
+        201903,
+    )
+    assert get_job_posting(db_test_path, "https://example.com/j/1") is not None
+
+
+def test_load_profile_from_csv_appends_to_existing_rows(tmp_path):
+    add_skills(db_test_path, 1, "Existing", ["Kept"])
+    seed = tmp_path / "profile.csv"
+    seed.write_text(
+        "section,full_name,skill,detail\n"
+        "personal_info,Jane Doe,,\n"
+        "skills,,Programming,\n"
+        "skill_details,,,Python\n"
+        "skill_details,,,SQL\n"
+    )
+    load_profile(db_test_path, str(seed))
+    assert get_person_info(db_test_path, 1).full_name == "Jane Doe"
+    assert get_skills(db_test_path, 1, as_lists=True) == [
+        ("Existing", ["Kept"]),
+        ("Programming", ["Python", "SQL"]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "records",
+    [
+        [{"section": "personal_info", "full_name": "A"}, {"section": "nope"}],
+        [{"section": "personal_info", "nickname": "A"}],
+        [{"section": "responsibilities", "description": "Orphan"}],
+    ],
+)
+def test_load_profile_rejects_bad_seed_atomically(tmp_path, records):
+    seed = tmp_path / "bad.jsonl"
+    seed.write_text("\n".join(json.dumps(record) for record in records))
+    with pytest.raises(ValueError):
+        load_profile(db_test_path, str(seed))
+    assert fetch_data(db_test_path, "SELECT * FROM Personal_Info") == []
+
+
+def load_people(tmp_path, count):
+    seed = tmp_path / "people.json"
+    with open(SAMPLE_PROFILE, encoding="utf-8") as f:
+        profile = json.load(f)
+    people = []
+    for n in range(count):
+        person = json.loads(json.dumps(profile))
+        person["personal_info"]["full_name"] = f"Person {n}"
+        person["employment"][0]["company"] = f"Company {n}"
+        person["employment"].append(
+            {"company": "Earlier", "start_date": f"{2000 + n}", "end_date": "2009"}
+        )
+        people.append(person)
+    seed.write_text(json.dumps(people))
+    load_profile(db_test_path, str(seed))
+
+
+@pytest.mark.parametrize("as_lists", [False, True])
+def test_batch_getters_match_per_person_getters(tmp_path, as_lists):
+    load_people(tmp_path, 3)
+    ids = [3, 1, 99, 2]
+    filters = {"employment_filters": {"resp_fields": ["General"]}}
+
+    snapshots = get_resume_snapshots(db_test_path, ids, filters, as_lists)
+    assert snapshots == {
+        person_id: get_resume_snapshot(db_test_path, person_id, filters, as_lists)
+        for person_id in ids
+    }
+    assert snapshots[99] is None
+    assert snapshots[2]["full_name"] == "Person 1"
+
+    jobs = get_employment_many(db_test_path, ids, as_lists=as_lists)
+    assert jobs == {
+        person_id: get_employment(db_test_path, person_id, as_lists=as_lists)
+        for person_id in ids
+    }
+    assert [job.company for job in jobs[3]] == ["Company 2", "Earlier"]
+
+
+def test_batch_getters_use_one_indexed_statement(tmp_path):
+    load_people(tmp_path, 5)
+    plans = query_plans(lambda: get_resume_snapshots(db_test_path, range(1, 6)))
+    assert len(plans) == 1
+    details = plans[0]
+    for index in ("idx_employment_person", "idx_skills_person", "idx_projects_person"):
+        assert any(f"USING INDEX {index}" in d for d in details), details
@@ -0,0 +1,519 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+import embedding_cache
+import job_relavancy_scorer as scorer
+import model_registry
+import profile_cache
+import vector_index
+from db_connection import close_connections
+from db_loader_generic import load_generic
+from db_manager import (
+    add_employment,
+    add_job_posting,
+    add_skills,
+    execute_query,
+    fetch_data,
+    fetch_one_data,
+)
+from db_records import EmploymentRecord, JobPosting
+from lexical_prefilter import bm25_scores, prefilter
+from onnx_encoder import (
+    CONFIG_FILE,
+    ONNX_FILE,
+    QUANTIZED_FILE,
+    TOKENIZER_FILE,
+    OnnxEncoder,
+    export_onnx,
+    load_onnx,
+)
+from setup_db import clone_schema
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    model_registry.unload()
+    yield
+    model_registry.set_backend(None)
+
+
+def test_model_source_prefers_local_copies(tmp_path, monkeypatch):
+    monkeypatch.delenv(model_registry.MODEL_DIR_ENV_VAR, raising=False)
+    assert model_registry.model_source("all-MiniLM-L6-v2") == "all-MiniLM-L6-v2"
+
+    (tmp_path / "all-MiniLM-L6-v2").mkdir()
+    monkeypatch.setenv(model_registry.MODEL_DIR_ENV_VAR, str(tmp_path))
+    assert model_registry.model_source("all-MiniLM-L6-v2") == os.path.join(
+        tmp_path, "all-MiniLM-L6-v2"
+    )
+    assert model_registry.model_source("other-model") == "other-model"
+
+    model_registry.register_model_path("registered-model", "/models/registered")
+    assert model_registry.model_source("registered-model") == "/models/registered"
+
+
+def test_get_model_loads_once_across_threads(monkeypatch):
+    loads = []
+
+    def slow_load(name, _device):
+        loads.append(name)
+        time.sleep(0.05)
+        return object()
+
+    monkeypatch.setattr(model_registry, "_load", slow_load)
+    models = []
+    threads = [
+        threading.Thread(
+            target=lambda: models.append(model_registry.get_model("m", "cpu"))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["m"]
+    assert len({id(model) for model in models}) == 1
+
+
+def test_warm_up_reports_load_stats():
+    pytest.importorskip("sentence_transformers")
+    stats = model_registry.warm_up(device="cpu")
+    model = model_registry.get_model()
+    assert model_registry.get_model() is model
+    loaded = stats[model_registry.DEFAULT_MODEL]
+    assert loaded.device == "cpu"
+    assert loaded.load_seconds > 0
+    assert loaded.parameter_bytes > 0
+
+
+def test_models_load_with_the_selected_backend(monkeypatch):
+    monkeypatch.delenv(model_registry.BACKEND_ENV_VAR, raising=False)
+    assert model_registry.encoder_backend() == "torch"
+    with pytest.raises(ValueError):
+        model_registry.set_backend("missing")
+
+    loaded = []
+    model_registry.register_backend(
+        "recording", lambda source, device: loaded.append((source, device)) or object()
+    )
+    monkeypatch.setenv(model_registry.BACKEND_ENV_VAR, "recording")
+    model = model_registry.get_model("m")
+    assert loaded == [("m", "cpu")]
+    assert model_registry.model_stats()["m"].backend == "recording"
+
+    model_registry.set_backend("torch")  # Switching backends unloads models
+    assert model_registry.model_stats() == {}
+    model_registry.set_backend("recording")
+    assert model_registry.get_model("m") is not model
+
+
+def test_onnx_backend_agrees_with_torch(tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("sentence_transformers")
+
+    texts = ["Built data pipelines in Python", "Managed a retail team", "SQL"]
+    expected = model_registry.get_model(device="cpu").encode(texts)
+    model_dir = export_onnx(model_registry.DEFAULT_MODEL, str(tmp_path))
+    for quantized in (False, True):
+        vectors = OnnxEncoder(model_dir, quantized).encode(texts)
+        agreement = (vectors * expected).sum(axis=1)
+        assert agreement.min() > (0.95 if quantized else 0.999)
+    assert OnnxEncoder(model_dir).encode("SQL").shape == expected[2].shape
+
+
+def _write_tiny_onnx_model(model_dir):
+    """Writes an export_onnx-style directory whose transformer is a lookup table."""
+    onnx = pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    tokenizers = pytest.importorskip("tokenizers")
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    vocab = ["[PAD]", "[UNK]", "built", "data", "pipelines", "sql", "retail"]
+    table = np.random.default_rng(0).normal(size=(len(vocab), 8)).astype(np.float32)
+    graph = onnx.helper.make_graph(
+        [
+            onnx.helper.make_node("Gather", ["table", "input_ids"], ["lookup"]),
+            onnx.helper.make_node("MatMul", ["lookup", "weight"], ["token_embeddings"]),
+        ],
+        "tiny",
+        [
+            onnx.helper.make_tensor_value_info(
+                name, onnx.TensorProto.INT64, ["batch", "tokens"]
+            )
+            for name in ("input_ids", "attention_mask")
+        ],
+        [
+            onnx.helper.make_tensor_value_info(
+                "token_embeddings", onnx.TensorProto.FLOAT, ["batch", "tokens", 8]
+            )
+        ],
+        [
+            onnx.numpy_helper.from_array(table, "table"),
+            onnx.numpy_helper.from_array(np.eye(8, dtype=np.float32), "weight"),
+        ],
+    )
+    path = os.path.join(model_dir, ONNX_FILE)
+    # The opset and IR version torch.onnx.export writes in export_onnx
+    model = onnx.helper.make_model(
+        graph, opset_imports=[onnx.helper.make_opsetid("", 14)], ir_version=8
+    )
+    onnx.save(model, path)
+    quantize_dynamic(
+        path, os.path.join(model_dir, QUANTIZED_FILE), weight_type=QuantType.QInt8
+    )
+
+    tokenizer = tokenizers.Tokenizer(
+        tokenizers.models.WordLevel(
+            {token: i for i, token in enumerate(vocab)}, unk_token="[UNK]"
+        )
+    )
+    tokenizer.normalizer = tokenizers.normalizers.Lowercase()
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer.save(os.path.join(model_dir, TOKENIZER_FILE))
+    config = {
+        "source": "tiny",
+        "max_seq_length": 4,
+        "pad_id": 0,
+        "pad_token": "[PAD]",
+        "normalize": True,
+        "dim": 8,
+    }
+    with open(os.path.join(model_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    return table, {token: i for i, token in enumerate(vocab)}
+
+
+def test_onnx_encoder_runs_an_exported_model(tmp_path):
+    table, vocab = _write_tiny_onnx_model(str(tmp_path))
+    texts = ["SQL", "built data pipelines", "retail sql unknown words here"]
+
+    expected = []
+    for text in texts:
+        # Truncated to max_seq_length tokens, then mean pooled and normalized
+        tokens = [vocab.get(word.lower(), 1) for word in text.split()][:4]
+        vector = table[tokens].mean(axis=0)
+        expected.append(vector / np.linalg.norm(vector))
+    expected = np.array(expected)
+
+    # batch_size=2 pads the short text alongside a longer one
+    encoder = OnnxEncoder(str(tmp_path), quantized=False, batch_size=2)
+    vectors = encoder.encode(texts)
+    assert vectors.dtype == np.float32
+    assert np.allclose(vectors, expected, atol=1e-6)
+    assert np.allclose(encoder.encode(texts[1]), expected[1], atol=1e-6)
+
+    quantized = load_onnx(str(tmp_path)).encode(texts, batch_size=1)
+    assert (quantized * expected).sum(axis=1).min() > 0.99
+
+
+class CountingEncoder:
+    """Deterministic stand-in for a SentenceTransformer that counts its inputs."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **_kwargs):
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+        self.encoded.append(list(texts))
+        return np.array([[len(text), text.count(" ") + 1.0] for text in texts])
+
+
+@pytest.fixture(name="cache_db")
+def cache_db_fixture():
+    path = "file:embedding_test?mode=memory&cache=shared"
+    clone_schema(path)
+    yield path
+    close_connections()
+
+
+def test_encode_cached_only_encodes_misses(cache_db):
+    embedding_cache.reset_cache_stats()
+    encoder = CountingEncoder()
+    first = embedding_cache.encode_cached(cache_db, encoder, "m", ["a b", "c", "a b"])
+    second = embedding_cache.encode_cached(cache_db, encoder, "m", ["c", "d e f"])
+    assert encoder.encoded == [["a b", "c"], ["d e f"]]
+    assert first.tolist() == [[3, 2], [1, 1], [3, 2]]
+    assert second.tolist() == [[1, 1], [5, 3]]
+    assert embedding_cache.cache_stats() == {"hits": 2, "misses": 3, "hit_rate": 0.4}
+
+    # Entries are per model
+    embedding_cache.encode_cached(cache_db, encoder, "other", ["c"])
+    assert encoder.encoded[-1] == ["c"]
+
+
+def test_embeddings_round_trip_float16(cache_db):
+    embedding_cache.put_embeddings(cache_db, "m", ["x"], [[0.5, 0.25]], "float16")
+    (vector,) = embedding_cache.get_embeddings(cache_db, "m", ["x", "y"]).values()
+    assert vector.dtype.name == "float32"
+    assert vector.tolist() == [0.5, 0.25]
+
+
+def test_embedding_eviction_and_vacuum(cache_db):
+    add_skills(cache_db, 1, "Programming", ["Python", "SQL"])
+    texts = ["Python", "SQL", "Removed bullet"]
+    embedding_cache.put_embeddings(cache_db, "m", texts, [[1.0]] * 3)
+    assert embedding_cache.vacuum(cache_db) == 1
+    assert embedding_cache.evict(cache_db, max_entries=1) == 1
+    assert fetch_one_data(cache_db, "SELECT COUNT(*) FROM Embeddings") == (1,)
+    assert embedding_cache.evict(cache_db, unused_days=-1) == 1
+
+
+def test_score_resume_matches_per_position_scoring(monkeypatch):
+    encoder = CountingEncoder()
+    monkeypatch.setattr(scorer, "get_model", lambda name: encoder)
+    job = JobPosting._make([1, "Engineer", "Acme"] + ["x y"] * 14)
+    empty = [None] * len(EmploymentRecord._fields)
+    positions = [
+        EmploymentRecord._make(empty)._replace(
+            end_date="2024", responsibilities=bullets
+        )
+        for bullets in (["a b c", "d"], [], ["e f", "g h i j", "k"])
+    ]
+
+    batched = scorer.score_resume(job, positions)
+    assert len(encoder.encoded) == 2  # The posting, then every bullet at once
+    assert encoder.encoded[1] == ["a b c", "d", "e f", "g h i j", "k"]
+    assert batched[1] is None
+    assert scorer.score_resume(job, positions, top_N=2)[2] == ["g h i j", "e f"]
+    for position, selection in zip(positions, batched):
+        if position.responsibilities:
+            assert selection == scorer.score_and_rank_relevance(job, position)
+
+
+def test_posting_embedding_is_stored_with_the_posting(cache_db):
+    url = "https://jobs.example.com/123"
+    add_job_posting(cache_db, {"job_title": "Engineer"}, posting_url=url)
+    encoder = CountingEncoder()
+    first = embedding_cache.encode_posting(cache_db, encoder, "m", url, "a b")
+    again = embedding_cache.encode_posting(
+        cache_db, encoder, "m", url + "?utm_source=x", "a b"
+    )
+    assert encoder.encoded == [["a b"]]
+    assert again.tolist() == first.tolist() == [3, 2]
+
+    # Edited postings are re-encoded; unknown ones are encoded but not stored
+    assert embedding_cache.encode_posting(cache_db, encoder, "m", url, "c").tolist()
+    embedding_cache.encode_posting(cache_db, encoder, "m", "https://other.com", "c")
+    assert encoder.encoded[1:] == [["c"], ["c"]]
+    assert fetch_one_data(
+        cache_db, "SELECT COUNT(*), MAX(text_hash) FROM Posting_Embeddings"
+    ) == (1, embedding_cache.text_hash("c"))
+
+    execute_query(cache_db, "DELETE FROM Job_Postings")
+    assert embedding_cache.vacuum(cache_db) == 1
+
+
+def test_vector_index_appends_and_queries(cache_db, tmp_path):
+    add_employment(
+        cache_db,
+        1,
+        "Acme",
+        "Remote",
+        "Dev",
+        "2020",
+        "2021",
+        "Software",
+        ["a", "b c d"],
+        ["x", "x"],
+    )
+    encoder = CountingEncoder()
+    index_dir = str(tmp_path / "index")
+    assert vector_index.build_index(cache_db, index_dir, encoder, "m", "float16") == 2
+    assert vector_index.append_index(cache_db, index_dir, encoder) == 0
+
+    add_employment(
+        cache_db,
+        2,
+        "Initech",
+        "Austin",
+        "QA",
+        "2019",
+        "2020",
+        "Software",
+        ["e f g h"],
+        ["x"],
+    )
+    assert vector_index.append_index(cache_db, index_dir, encoder) == 1
+    assert encoder.encoded == [["a", "b c d"], ["e f g h"]]
+
+    index = vector_index.open_index(index_dir)
+    assert index.vectors.shape == (3, 2) and index.vectors.dtype.name == "float16"
+    assert [id_ for id_, _ in vector_index.query_index(index, [7, 4], k=2)] == [3, 2]
+
+    execute_query(cache_db, "DELETE FROM Responsibilities WHERE id = 3")
+    hits = vector_index.top_bullets(cache_db, index_dir, "xxxxxxx y z w", 2, encoder)
+    assert [(hit.person_id, hit.text) for hit in hits] == [(1, "b c d"), (1, "a")]
+
+
+def test_query_index_scores_float16_indexes_in_float32_chunks(monkeypatch):
+    monkeypatch.setattr(vector_index, "QUERY_CHUNK_ROWS", 2)
+    rows = np.random.default_rng(1).normal(size=(5, 16))
+    rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+    vectors = rows.astype(np.float16)
+    index = vector_index.VectorIndex(
+        "m", "m@torch-fp32", "float16", 16, np.arange(10, 15), vectors
+    )
+    query = rows[3] + 0.1
+
+    hits = vector_index.query_index(index, query, k=5)
+    expected = vectors.astype(np.float32) @ (query / np.linalg.norm(query))
+    assert [id_ for id_, _ in hits] == [10 + i for i in np.argsort(-expected)]
+    assert np.allclose([score for _, score in hits], np.sort(expected)[::-1])
+    assert hits[0][0] == 13
+
+
+def test_vector_index_reencodes_edited_and_reused_ids(cache_db, tmp_path):
+    add_employment(cache_db, 1, "Acme", "", "Dev", "2020", "", "", ["a", "b"], "xx")
+    encoder = CountingEncoder()
+    index_dir = str(tmp_path / "index")
+    vector_index.build_index(cache_db, index_dir, encoder, "m")
+
+    execute_query(cache_db, "UPDATE Responsibilities SET description = 'a b c d'")
+    execute_query(cache_db, "DELETE FROM Responsibilities WHERE id = 2")
+    execute_query(
+        cache_db,
+        "INSERT INTO Responsibilities (id, employment_id, description) "
+        "VALUES (2, 1, 'ten chars.'), (3, 1, 'new')",
+    )
+    assert vector_index.append_index(cache_db, index_dir, encoder) == 3
+    assert encoder.encoded[-1] == ["a b c d", "ten chars.", "new"]
+    assert vector_index.append_index(cache_db, index_dir, encoder) == 0
+
+    index = vector_index.open_index(index_dir)
+    assert index.ids.tolist() == [1, 2, 3]
+    hits = vector_index.top_bullets(cache_db, index_dir, "x" * 10 + " y", 3, encoder)
+    assert [hit.text for hit in hits] == ["ten chars.", "new", "a b c d"]
+    posting, bullet = np.array([10.0, 2.0]), np.array([12.0, 2.0])
+    expected = posting @ bullet / np.linalg.norm(posting) / np.linalg.norm(bullet)
+    assert np.isclose(hits[0].score, expected)
+
+
+def test_bm25_prefilter_keeps_best_lexical_matches():
+    scores = bm25_scores("Python developers", ["Wrote Python", "Sold shoes", ""])
+    assert scores[0] < 0 and scores[1:] == [0.0, 0.0]
+    groups = [
+        ["Sold shoes", "Developed Python services", "Python and SQL reporting"],
+        [],
+        ["Managed a team", "Hired developers"],
+    ]
+    assert prefilter("python developer", groups, 2) == [[1, 2], [], [0, 1]]
+    assert prefilter("python developer", groups, 1) == [[1], [], [1]]
+
+
+def test_score_resume_prefilter_and_recall(monkeypatch):
+    encoder = CountingEncoder()
+    monkeypatch.setattr(scorer, "get_model", lambda name: encoder)
+    job = JobPosting._make(["Python developer"] + [""] * 16)
+    position = EmploymentRecord._make([None] * 7)._replace(
+        end_date="2024",
+        responsibilities=["Sold shoes", "Wrote Python code", "Hired a developer"],
+    )
+
+    selection = scorer.score_resume(job, [position], prefilter_top_m=2)
+    assert encoder.encoded[-1] == ["Wrote Python code", "Hired a developer"]
+    assert sorted(selection[0]) == ["Hired a developer", "Wrote Python code"]
+
+    monkeypatch.setenv("RESUME_PREFILTER_TOP_M", "1")
+    scorer.score_resume(job, [position])
+    assert encoder.encoded[-1] == ["Wrote Python code"]
+
+    report = scorer.prefilter_recall(job, [position], 2, top_N=3)
+    assert report["bullets"] == 3 and report["embedded"] == 2
+    assert report["recall"] == 2 / 3
+
+
+def test_embedding_cache_hits_keep_profile_snapshots_cached(cache_db):
+    load_generic(cache_db)
+    encoder = CountingEncoder()
+    texts = ["Helped customers", "Stocked shelves"]
+    embedding_cache.encode_cached(cache_db, encoder, "m", texts)
+    execute_query(cache_db, "UPDATE Embeddings SET last_used = 0")  # Due a touch
+    profile_cache.invalidate()
+    profile_cache.reset_cache_stats()
+
+    for _ in range(3):
+        profile_cache.get_cached_snapshot(cache_db, 1, as_lists=True)
+        embedding_cache.encode_cached(cache_db, encoder, "m", texts)
+    assert len(encoder.encoded) == 1
+    stats = profile_cache.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 1, 0)
+
+
+def test_embedding_writes_keep_profile_snapshots_cached(cache_db):
+    load_generic(cache_db)
+    url = "https://jobs.example.com/1"
+    add_job_posting(cache_db, {"job_title": "Engineer"}, posting_url=url)
+    profile_cache.invalidate()
+    profile_cache.reset_cache_stats()
+    first = profile_cache.get_cached_snapshot(cache_db, 1)
+
+    encoder = CountingEncoder()
+    embedding_cache.encode_cached(cache_db, encoder, "m", ["New bullet"])
+    embedding_cache.encode_posting(cache_db, encoder, "m", url, "Posting text")
+    assert len(encoder.encoded) == 2
+    assert profile_cache.get_cached_snapshot(cache_db, 1) is first
+    assert profile_cache.cache_stats()["invalidations"] == 0
+
+
+def test_embeddings_are_keyed_by_encoder_backend(cache_db, tmp_path, monkeypatch):
+    monkeypatch.delenv(model_registry.BACKEND_ENV_VAR, raising=False)
+    model_registry.register_backend(
+        "counting", lambda source, device: CountingEncoder()
+    )
+    assert model_registry.embedding_key("m") == "m@torch-fp32"
+    model_registry.set_backend("onnx")
+    assert model_registry.embedding_key("m") == "m@onnx-int8"
+
+    model_registry.set_backend("counting")
+    add_employment(cache_db, 1, "Acme", "", "Dev", "2020", "", "", ["a b"], ["x"])
+    vector_index.build_index(cache_db, str(tmp_path), model_name="m")
+    job = JobPosting._make(["Developer"] + [""] * 16)
+    position = EmploymentRecord._make([None] * 7)._replace(
+        end_date="2024", responsibilities=["a b"]
+    )
+    scorer.score_resume(
+        job, [position], db_path=cache_db, posting_url="https://jobs.example.com/1"
+    )
+    keys = fetch_data(cache_db, "SELECT DISTINCT model FROM Embeddings ORDER BY 1")
+    assert keys == [
+        (f"{model_registry.DEFAULT_MODEL}@counting",),
+        ("m@counting",),
+    ]
+
+    model_registry.set_backend("onnx")
+    with pytest.raises(ValueError):
+        vector_index.top_bullets(cache_db, str(tmp_path), "a b")
+
+
+def test_prefilter_recall_reports_changed_drop_decisions(monkeypatch):
+    class FixedEncoder:
+        """Puts the posting at [1, 0] and the Python bullet at cosine 0.25."""
+
+        def encode(self, texts, **_kwargs):
+            if isinstance(texts, str):
+                return np.array([1.0, 0.0])
+            return np.array(
+                [[0.25, 0.968] if "Python" in text else [0.0, 1.0] for text in texts]
+            )
+
+    monkeypatch.setattr(scorer, "get_model", lambda name: FixedEncoder())
+    job = JobPosting._make(["Python developer"] + [""] * 16)
+    position = EmploymentRecord._make([None] * 7)._replace(
+        end_date="2024",
+        responsibilities=["Wrote Python", "Sold shoes", "Mopped", "Filed"],
+    )
+
+    # All four bullets average 0.06, so the position is dropped; the Python
+    # bullet alone averages 0.25, which passes a 0.2 threshold
+    assert scorer.score_resume(job, [position], relevance_threshold=0.2) == [None]
+    assert scorer.score_resume(
+        job, [position], relevance_threshold=0.2, prefilter_top_m=1
+    ) == [["Wrote Python"]]
+    report = scorer.prefilter_recall(job, [position], 1, relevance_threshold=0.2)
+    assert report["positions_added"] == 1 and report["positions_dropped"] == 0
+    assert report["recall"] == 1.0  # No full-embedding selections to miss
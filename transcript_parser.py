@@ -2,7 +2,8 @@ import pdfplumber
 import re
 import json
 from typing import List
-from db_manager import add_education, add_coursework
+from db_manager import add_education, bulk_add_coursework
+from db_connection import connection
 
 
 class TranscriptParser:
@@ -247,22 +248,36 @@ class TranscriptParser:
 
     def load_to_db(self, db_path, person_id: int, education_id: int) -> None:
         """Loads extracted data into the database."""
-        if self.education_info["institution"]:
-            add_education(person_id, **self.education_info)
-
-        for term in self.terms_data:
-            for course in term["courses"]:
-                add_coursework(
-                    path=db_path,
-                    education_id=education_id,
-                    course_name=course["course_name"],
-                    course_id=course["course_id"],
-                    term=term["term"].split()[0],
-                    year=int(term["term"].split()[1]),
-                    gpa=course["grade"],
-                    course_credits=course["credits"],
+        with connection(db_path):
+            if self.education_info["institution"]:
+                add_education(
+                    db_path,
+                    person_id,
+                    self.education_info["degree"],
+                    self.education_info["institution"],
+                    self.education_info["term_system"],
+                    self.education_info["graduation_year"],
+                    self.education_info["graduation_gpa"],
                 )
 
+            bulk_add_coursework(
+                db_path,
+                (
+                    (
+                        education_id,
+                        course["course_name"],
+                        course["course_id"],
+                        term["term"].split()[0],
+                        int(term["term"].split()[1]),
+                        course["grade"],
+                        course["course_credits"],
+                        None,
+                    )
+                    for term in self.terms_data
+                    for course in term["courses"]
+                ),
+            )
+
 
 def main():
     db_path = r"/\resume.db"
@@ -4,7 +4,8 @@ import openai
 from openai import OpenAIError
 from dotenv import load_dotenv
 import os
-from db_manager import add_education, add_coursework, get_education
+from db_manager import add_education, bulk_add_coursework, get_education
+from db_connection import connection
 
 load_dotenv()
 
@@ -108,28 +109,34 @@ def save_transcript_to_db(db_path_fn, person_id, transcript_data):
     institution = transcript_data["institution"]
     term_system = transcript_data["term_system"]
 
-    for degree in transcript_data["degrees"]:
-        education_id = add_education(
-            db_path_fn,
-            person_id,
-            degree["degree"],
-            institution,
-            term_system,
-            degree["graduation_year"],
-            degree["graduation_gpa"],
-        )
+    # Degrees and their courses are written in one transaction
+    with connection(db_path_fn):
+        for degree in transcript_data["degrees"]:
+            education_id = add_education(
+                db_path_fn,
+                person_id,
+                degree["degree"],
+                institution,
+                term_system,
+                degree["graduation_year"],
+                degree["graduation_gpa"],
+            )
 
-        for course in transcript_data["courses"]:
-            add_coursework(
+            bulk_add_coursework(
                 db_path_fn,
-                education_id,
-                course["course_name"],
-                course["course_id"],
-                course["term"],
-                course["year"],
-                course["gpa"],
-                course["course_credits"],
-                course["field"],
+                (
+                    (
+                        education_id,
+                        course["course_name"],
+                        course["course_id"],
+                        course["term"],
+                        course["year"],
+                        course["gpa"],
+                        course["course_credits"],
+                        course["field"],
+                    )
+                    for course in transcript_data["courses"]
+                ),
             )
 
 
@@ -0,0 +1,241 @@
+import json
+import os
+from collections import namedtuple
+import numpy as np
+from db_connection import connection
+from db_records import BulletHit
+from embedding_cache import DEFAULT_DTYPE, encode_cached, text_hash
+from model_registry import DEFAULT_MODEL, embedding_key, get_model
+
+# An index directory holds META_FILE (model, embedding key, dtype and dim),
+# VECTORS_FILE (a row-major matrix of unit-length vectors, one row per
+# responsibility), HASHES_FILE (the sha256 of each row's text) and IDS_FILE
+# (the int64 Responsibilities id of each row). New rows are appended and
+# count as indexed once their id is written; rows whose text changed are
+# overwritten in place.
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.bin"
+HASHES_FILE = "hashes.bin"
+IDS_FILE = "ids.bin"
+HASH_SIZE = 32
+# Rows scored per matrix-vector product; float16 rows are widened to float32
+# one chunk at a time rather than copying the whole index
+QUERY_CHUNK_ROWS = 65536
+
+VectorIndex = namedtuple("VectorIndex", "model key dtype dim ids vectors")
+
+
+def _read_meta(index_dir):
+    with open(os.path.join(index_dir, META_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _index_model(meta, model):
+    """Returns model, or the registry's model if it matches the index.
+
+    The encoder backend may have changed since the index was built, in which
+    case the registry's vectors can't be compared with the indexed ones.
+    """
+    if model is not None:
+        return model
+    if embedding_key(meta["model"]) != meta["key"]:
+        raise ValueError(
+            f"Index was built with {meta['key']}, not {embedding_key(meta['model'])}; "
+            "rebuild it"
+        )
+    return get_model(meta["model"])
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def build_index(db_path, index_dir, model=None, model_name=DEFAULT_MODEL, dtype=None):
+    """Writes a fresh index of every responsibility in the database.
+
+    dtype is float32 or float16 (half the size, slightly less precise).
+    Returns the number of vectors indexed.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    for name in (VECTORS_FILE, HASHES_FILE, IDS_FILE):
+        open(os.path.join(index_dir, name), "wb").close()
+    meta = {
+        "model": model_name,
+        "key": embedding_key(model_name),
+        "dtype": dtype or DEFAULT_DTYPE,
+        "dim": None,
+    }
+    with open(os.path.join(index_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return append_index(db_path, index_dir, model)
+
+
+def _read_hashes(index_dir, count):
+    """Returns the text hash of each indexed row (None where unknown)."""
+    path = os.path.join(index_dir, HASHES_FILE)
+    data = b""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            data = f.read(count * HASH_SIZE)
+    return [
+        data[row * HASH_SIZE : (row + 1) * HASH_SIZE] or None for row in range(count)
+    ]
+
+
+def _write_rows(path, changed, added, count):
+    """Overwrites rows in place and appends new ones after the first count.
+
+    changed holds (row position, bytes) pairs and added the new rows' bytes;
+    every row has the same size.
+    """
+    with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+        for position, row in changed:
+            f.seek(position * len(row))
+            f.write(row)
+        if added:
+            f.seek(count * len(added[0]))
+            f.write(b"".join(added))
+            f.truncate()
+
+
+def append_index(db_path, index_dir, model=None):
+    """Brings the index up to date with the responsibilities in the database.
+
+    New responsibilities are appended and those whose text changed since
+    they were indexed (including ids reused for a new bullet) have their
+    vector overwritten in place, so this costs one encode of the new and
+    changed bullets (cached ones are reused). Returns the number of vectors
+    added or updated. Deleted bullets are skipped when queries are resolved.
+    """
+    meta = _read_meta(index_dir)
+    ids = open_index(index_dir).ids
+    positions = {int(id_): row for row, id_ in enumerate(ids)}
+    count = len(ids)
+    del ids
+    hashes = _read_hashes(index_dir, count)
+    with connection(db_path) as conn:
+        rows = conn.execute(
+            "SELECT id, description FROM Responsibilities "
+            "WHERE description IS NOT NULL ORDER BY id"
+        ).fetchall()
+    stale = []
+    for id_, text in rows:
+        digest = bytes.fromhex(text_hash(text))
+        if id_ not in positions or hashes[positions[id_]] != digest:
+            stale.append((id_, text, digest))
+    if not stale:
+        return 0
+
+    model = _index_model(meta, model)
+    vectors = _normalize(
+        encode_cached(db_path, model, meta["key"], [text for _, text, _ in stale])
+    )
+    if meta["dim"] is None:
+        meta["dim"] = vectors.shape[1]
+        with open(os.path.join(index_dir, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    elif vectors.shape[1] != meta["dim"]:
+        raise ValueError(f"Expected {meta['dim']}-d vectors, got {vectors.shape[1]}")
+
+    vectors = vectors.astype(meta["dtype"])
+    changed = [
+        (positions[id_], i) for i, (id_, _, _) in enumerate(stale) if id_ in positions
+    ]
+    added = [i for i, (id_, _, _) in enumerate(stale) if id_ not in positions]
+    # Vectors, then hashes, then ids: after a crash, rows whose hash doesn't
+    # match are re-encoded and rows without an id are unused
+    for name, row_bytes in (
+        (VECTORS_FILE, lambda i: vectors[i].tobytes()),
+        (HASHES_FILE, lambda i: stale[i][2]),
+    ):
+        _write_rows(
+            os.path.join(index_dir, name),
+            [(position, row_bytes(i)) for position, i in changed],
+            [row_bytes(i) for i in added],
+            count,
+        )
+    with open(os.path.join(index_dir, IDS_FILE), "ab") as f:
+        f.write(np.array([stale[i][0] for i in added], dtype=np.int64).tobytes())
+    return len(stale)
+
+
+def open_index(index_dir):
+    """Maps an index into memory (read-only) without copying its vectors."""
+    meta = _read_meta(index_dir)
+    ids_path = os.path.join(index_dir, IDS_FILE)
+    count = os.path.getsize(ids_path) // np.dtype(np.int64).itemsize
+    if not count:
+        empty = np.empty((0, meta["dim"] or 0), dtype=meta["dtype"])
+        return VectorIndex(
+            meta["model"],
+            meta["key"],
+            meta["dtype"],
+            meta["dim"],
+            np.empty(0, np.int64),
+            empty,
+        )
+    return VectorIndex(
+        meta["model"],
+        meta["key"],
+        meta["dtype"],
+        meta["dim"],
+        np.memmap(ids_path, dtype=np.int64, mode="r", shape=(count,)),
+        np.memmap(
+            os.path.join(index_dir, VECTORS_FILE),
+            dtype=meta["dtype"],
+            mode="r",
+            shape=(count, meta["dim"]),
+        ),
+    )
+
+
+def query_index(index, vector, k=10):
+    """Returns the k (Responsibilities id, similarity) pairs nearest vector.
+
+    Similarity is cosine, from matrix-vector products over chunks of the
+    index; pairs are ordered best first.
+    """
+    if not len(index.ids):
+        return []
+    query = _normalize(vector)
+    scores = np.empty(len(index.ids), dtype=np.float32)
+    for start in range(0, len(scores), QUERY_CHUNK_ROWS):
+        chunk = index.vectors[start : start + QUERY_CHUNK_ROWS]
+        scores[start : start + len(chunk)] = np.asarray(chunk, dtype=np.float32) @ query
+    k = min(k, len(scores))
+    # Only the k best are sorted, not the whole corpus
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(int(index.ids[i]), float(scores[i])) for i in top]
+
+
+def top_bullets(db_path, index_dir, text, k=10, model=None):
+    """Returns the k responsibilities most similar to text, across everyone.
+
+    text is typically a job posting. Hits are BulletHit records, best first.
+    """
+    index = open_index(index_dir)
+    model = _index_model(_read_meta(index_dir), model)
+    vector = model.encode([text], convert_to_numpy=True)[0]
+    # Over-fetch a little in case bullets were deleted since they were indexed
+    hits = query_index(index, vector, k + k // 2 + 1)
+    with connection(db_path) as conn:
+        rows = {
+            row[0]: row
+            for row in conn.execute(
+                """
+                SELECT r.id, e.person_id, r.employment_id, r.description
+                FROM Responsibilities AS r
+                JOIN Employment AS e ON e.id = r.employment_id
+                WHERE r.id IN (SELECT value FROM json_each(?))
+                """,
+                (json.dumps([id_ for id_, _ in hits]),),
+            )
+        }
+    return [
+        BulletHit(rows[id_][1], rows[id_][2], id_, rows[id_][3], score)
+        for id_, score in hits
+        if id_ in rows
+    ][:k]